@@ -0,0 +1,101 @@
+"""Memory of forked workers sharing preloaded catalogs, with and without freeze.
+
+Preloads synthetic catalogs in the parent, forks ``--workers`` processes
+that look up a sample of the keys, and prints as JSON the average unique
+set size (USS, private pages read from ``/proc/self/smaps_rollup``) of the
+workers in kilobytes. Linux only::
+
+    python benchmarks/fork_memory.py --workers 8 --locales 10 --files 50
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from i18n import catalog, resource_loader, translations, translator  # noqa: E402
+from run import configure, generate, reset  # noqa: E402
+
+
+def unique_set_size_kb():
+    uss = 0
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            if line.startswith(("Private_Clean:", "Private_Dirty:")):
+                uss += int(line.split()[1])
+    return uss
+
+
+def worker(write_fd, lookups):
+    for key, locale in lookups:
+        translator.t(key, locale=locale)
+    os.write(write_fd, "{0}\n".format(unique_set_size_kb()).encode("ascii"))
+    os._exit(0)
+
+
+def measure(args, freeze):
+    reset()
+    resource_loader.preload()
+    lookups = [
+        (key, locale)
+        for locale, table in sorted(translations.container.items())
+        for index, key in enumerate(sorted(table))
+        if index % args.sample == 0
+    ]
+    if freeze:
+        catalog.freeze()
+    read_fd, write_fd = os.pipe()
+    pids = []
+    for _ in range(args.workers):
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            worker(write_fd, lookups)
+        pids.append(pid)
+    os.close(write_fd)
+    with os.fdopen(read_fd) as f:
+        sizes = [int(line) for line in f]
+    for pid in pids:
+        os.waitpid(pid, 0)
+    return sum(sizes) / len(sizes)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Memory of forked workers sharing preloaded catalogs."
+    )
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--locales", type=int, default=5)
+    parser.add_argument("--files", type=int, default=20, help="files per locale")
+    parser.add_argument("--keys", type=int, default=30, help="keys per level")
+    parser.add_argument("--depth", type=int, default=2, help="nesting of keys")
+    parser.add_argument("--format", default="json")
+    parser.add_argument(
+        "--sample", type=int, default=10, help="look up one key out of SAMPLE"
+    )
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.formats = [args.format]
+    args.compact_storage = False
+    root_dir = tempfile.mkdtemp(prefix="i18n-bench-")
+    try:
+        generate(args, root_dir)
+        configure(args, root_dir, args.format)
+        results = {
+            "uss_per_worker_kb": measure(args, freeze=False),
+            "uss_per_worker_frozen_kb": measure(args, freeze=True),
+        }
+    finally:
+        shutil.rmtree(root_dir)
+    print(json.dumps(dict(vars(args), **results), indent=2, sort_keys=True))
+
+
+if __name__ == "__main__":
+    main()
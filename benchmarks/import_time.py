@@ -0,0 +1,68 @@
+"""Time taken by ``import i18n`` in a fresh interpreter.
+
+Runs ``python -X importtime -c "import i18n"`` several times and prints, as
+JSON, the best cumulative import time of the package and of its slowest
+modules, in microseconds. With ``--max-ms`` it exits with an error when the
+import is slower, so it can guard against regressions::
+
+    python benchmarks/import_time.py --max-ms 50
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def import_times():
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import i18n"],
+        cwd=ROOT_DIR,
+        stderr=subprocess.PIPE,
+        check=True,
+        universal_newlines=True,
+    ).stderr
+    times = {}
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        try:
+            times[name.strip()] = int(cumulative)
+        except ValueError:
+            pass  # header line
+    return times
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Time taken by import i18n in a fresh interpreter."
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="slowest modules shown")
+    parser.add_argument("--max-ms", type=float, help="fail above this import time")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    best = {}
+    for _ in range(args.repeat):
+        for name, microseconds in import_times().items():
+            best[name] = min(microseconds, best.get(name, microseconds))
+    slowest = sorted(best.items(), key=lambda item: item[1], reverse=True)
+    output = {
+        "import_i18n_us": best["i18n"],
+        "slowest_modules_us": dict(slowest[1 : args.top + 1]),
+        "parsers_imported": sorted({"yaml", "json"}.intersection(best)),
+    }
+    print(json.dumps(output, indent=2, sort_keys=True))
+    if args.max_ms is not None and best["i18n"] > args.max_ms * 1000:
+        sys.exit("import i18n took {0} us".format(best["i18n"]))
+
+
+if __name__ == "__main__":
+    main()
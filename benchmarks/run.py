@@ -0,0 +1,267 @@
+"""Benchmarks for python-i18n.
+
+Generates synthetic catalogs in a temporary directory, measures loading,
+lookups, pluralization and formatting, and prints the results as JSON::
+
+    python benchmarks/run.py --locales 10 --files 20 --output results.json
+    python benchmarks/run.py --compare results.json
+
+Times are the best of ``--repeat`` runs, in microseconds per operation
+(or per load for loading benchmarks).
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from i18n import (  # noqa: E402
+    config,
+    file_index,
+    resource_loader,
+    translations,
+    translator,
+)
+
+FALLBACK = "en"
+PLURAL = {
+    "zero": "no items",
+    "one": "one item",
+    "few": "a few items: %{count}",
+    "many": "%{count} items",
+}
+
+
+def _file_tree(args, locale, file_number):
+    random_generator = random.Random(file_number)
+
+    def build(depth):
+        tree = {}
+        for index in range(args.keys):
+            name = "key_{0}".format(index)
+            if depth < args.depth and index % 10 == 0:
+                tree["group_{0}".format(index)] = build(depth + 1)
+            elif index % 7 == 0:
+                tree[name] = dict(PLURAL)
+            elif index % 3 == 0:
+                tree[name] = "Hello %{name}, welcome to " + locale
+            else:
+                tree[name] = "text {0} {1}".format(
+                    locale, random_generator.randint(0, 10**6)
+                )
+        return tree
+
+    tree = build(1)
+    if locale == FALLBACK:
+        tree["only_fallback"] = "fallback text"
+    return tree
+
+
+def _write(filename, file_format, locale, tree):
+    data = {locale: tree}
+    with open(filename, "w", encoding="utf-8") as f:
+        if file_format == "json":
+            json.dump(data, f)
+        elif file_format == "yml":
+            import yaml
+
+            yaml.safe_dump(data, f, allow_unicode=True)
+        else:
+            f.write("{0} = {1!r}\n".format(locale, tree))
+
+
+def generate(args, root_dir):
+    locales = [FALLBACK] + ["l{0}".format(i) for i in range(1, args.locales)]
+    for file_format in args.formats:
+        for file_number in range(args.files):
+            directory = os.path.join(
+                root_dir, file_format, "dir{0}".format(file_number % 3)
+            )
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+            for locale in locales:
+                filename = os.path.join(
+                    directory,
+                    "ns{0}.{1}.{2}".format(file_number, locale, file_format),
+                )
+                _write(
+                    filename,
+                    file_format,
+                    locale,
+                    _file_tree(args, locale, file_number),
+                )
+    return locales
+
+
+def reset():
+    translations.container = {}
+    translations.clear_missing()
+    translator.formatters.clear()
+    translator.scopes.clear()
+    resource_loader.loaded_files.clear()
+    file_index.clear()
+
+
+def configure(args, root_dir, file_format):
+    config.set("load_path", [os.path.join(root_dir, file_format)])
+    config.set("file_format", file_format)
+    config.set("filename_format", "{namespace}.{locale}.{format}")
+    config.set("locale", FALLBACK)
+    config.set("fallback", FALLBACK)
+    config.set("compact_storage", args.compact_storage)
+
+
+def best_of(repeat, function, operations=1):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings) / operations * 1e6
+
+
+def keys_for(args, kind):
+    keys = []
+    for file_number in range(args.files):
+        prefix = "dir{0}.ns{1}.".format(file_number % 3, file_number)
+        for index in range(1, args.keys):
+            if index % 10 == 0 and args.depth > 1:
+                continue
+            if kind == "plural" and index % 7 == 0:
+                keys.append(prefix + "key_{0}".format(index))
+            elif kind == "format" and index % 3 == 0 and index % 7:
+                keys.append(prefix + "key_{0}".format(index))
+            elif kind == "text" and index % 3 and index % 7:
+                keys.append(prefix + "key_{0}".format(index))
+        if kind == "fallback":
+            keys.append(prefix + "only_fallback")
+    return keys
+
+
+def run_format(args, root_dir, locales, file_format):
+    results = {}
+    configure(args, root_dir, file_format)
+    other_locale = locales[-1]
+
+    def lazy_load():
+        reset()
+        for file_number in range(args.files):
+            key = "dir{0}.ns{1}.key_1".format(file_number % 3, file_number)
+            for locale in locales:
+                translator.t(key, locale=locale)
+
+    results["load_lazy"] = best_of(args.repeat, lazy_load)
+
+    def preload():
+        reset()
+        resource_loader.preload()
+
+    results["load_preload"] = best_of(args.repeat, preload)
+
+    text_keys = keys_for(args, "text")
+    format_keys = keys_for(args, "format")
+    plural_keys = keys_for(args, "plural")
+    fallback_keys = keys_for(args, "fallback")
+
+    def hits():
+        for key in text_keys:
+            translator.t(key, locale=other_locale)
+
+    def fallbacks():
+        for key in fallback_keys:
+            translator.t(key, locale=other_locale)
+
+    def plurals():
+        for count, key in enumerate(plural_keys):
+            translator.t(key, locale=other_locale, count=count % 12)
+
+    def formats():
+        for key in format_keys:
+            translator.t(key, locale=other_locale, name="Bob")
+
+    results["t_hit"] = best_of(args.repeat, hits, len(text_keys))
+    results["t_miss_fallback"] = best_of(args.repeat, fallbacks, len(fallback_keys))
+    results["t_pluralize"] = best_of(args.repeat, plurals, len(plural_keys))
+    results["t_format"] = best_of(args.repeat, formats, len(format_keys))
+
+    reset()
+    tracemalloc.start()
+    resource_loader.preload()
+    memory = tracemalloc.get_traced_memory()[0]
+    results["memory_per_locale_kb"] = memory / len(locales) / 1024.0
+    tracemalloc.stop()
+    return results
+
+
+def compare(previous, current):
+    lines = []
+    for file_format, results in sorted(current["results"].items()):
+        for name, value in sorted(results.items()):
+            before = previous["results"].get(file_format, {}).get(name)
+            if before:
+                lines.append(
+                    "{0:5} {1:22} {2:12.2f} {3:12.2f} {4:7.2f}x".format(
+                        file_format, name, before, value, value / before
+                    )
+                )
+    return "\n".join(lines)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Benchmarks for python-i18n.")
+    parser.add_argument("--locales", type=int, default=5)
+    parser.add_argument("--files", type=int, default=20, help="files per locale")
+    parser.add_argument("--keys", type=int, default=30, help="keys per level")
+    parser.add_argument("--depth", type=int, default=2, help="nesting of keys")
+    parser.add_argument("--formats", default="yml,json,py")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--compact-storage", action="store_true", help="store keys once per process"
+    )
+    parser.add_argument("--output", help="write the results to this file")
+    parser.add_argument("--compare", help="compare with previous results")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.formats = args.formats.split(",")
+    root_dir = tempfile.mkdtemp(prefix="i18n-bench-")
+    try:
+        locales = generate(args, root_dir)
+        output = {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "parameters": {
+                key: value
+                for key, value in vars(args).items()
+                if key not in ("output", "compare")
+            },
+            "results": {
+                file_format: run_format(args, root_dir, locales, file_format)
+                for file_format in args.formats
+            },
+        }
+    finally:
+        shutil.rmtree(root_dir)
+    text = json.dumps(output, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    if args.compare:
+        with open(args.compare) as f:
+            print(compare(json.load(f), output))
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
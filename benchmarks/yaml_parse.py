@@ -0,0 +1,61 @@
+"""YAML parse throughput of the loaders selectable with ``yaml_loader``.
+
+Generates one large catalog and prints, as JSON, the best time to parse it
+and the throughput in MB/s for each available loader::
+
+    python benchmarks/yaml_parse.py --keys 20000
+"""
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import yaml  # noqa: E402
+
+from i18n import config  # noqa: E402
+from i18n.loaders.yaml_loader import YamlLoader  # noqa: E402
+from run import PLURAL, best_of  # noqa: E402
+
+
+def catalog(keys):
+    tree = {}
+    for index in range(keys):
+        group = tree.setdefault("group_{0}".format(index % 50), {})
+        if index % 7 == 0:
+            group["key_{0}".format(index)] = dict(PLURAL)
+        else:
+            group["key_{0}".format(index)] = "Hello %{name}, text number " + str(index)
+    return yaml.safe_dump({"en": tree}, allow_unicode=True)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="YAML parse throughput of each available loader."
+    )
+    parser.add_argument("--keys", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    content = catalog(args.keys)
+    size_mb = len(content.encode("utf-8")) / 1e6
+    loader = YamlLoader()
+    choices = ["python"]
+    if getattr(yaml, "CSafeLoader", None) is not None:
+        choices.append("c")
+    results = {}
+    for choice in choices:
+        config.set("yaml_loader", choice)
+        seconds = best_of(args.repeat, lambda: loader.parse_file(content)) / 1e6
+        results[choice] = {"seconds": seconds, "mb_per_second": size_mb / seconds}
+    output = {"keys": args.keys, "size_mb": size_mb, "results": results}
+    print(json.dumps(output, indent=2, sort_keys=True))
+
+
+if __name__ == "__main__":
+    main()
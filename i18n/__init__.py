@@ -1,9 +1,19 @@
 from . import config, resource_loader
+from .aio import aload as aload
+from .aio import at as at
+from .catalog import freeze as freeze
+from .catalog import load_catalog as load_catalog
+from .config import get_locale as get_locale
+from .config import set_locale as set_locale
+from .config import use_locale as use_locale
 from .resource_loader import I18nFileLoadError as I18nFileLoadError
 from .resource_loader import load_config as load_config
+from .resource_loader import preload as preload
 from .resource_loader import register_loader as register_loader
 from .translations import add as add_translation  # noqa: F401
+from .translator import scope as scope
 from .translator import t as t
+from .translator import t_many as t_many
 
 resource_loader.init_loaders()
 load_path = config.get("load_path")
@@ -0,0 +1,54 @@
+from . import config, resource_loader, translations, translator
+
+# (event loop, locale, search group) -> future of the search in progress
+_pending = {}
+
+
+async def aload(key, locale=None):
+    """Load the files that may contain ``key`` without blocking the loop.
+
+    Searching the load path and parsing files run in the loop's default
+    executor. Concurrent calls for the same namespace and locale, or the
+    same key when large files are loaded partially, await the same search
+    instead of starting their own.
+    """
+    import asyncio
+
+    if locale is None:
+        locale = config.get_locale()
+    loop = asyncio.get_running_loop()
+    pending_key = (loop, locale, resource_loader.search_group(key))
+    future = _pending.get(pending_key)
+    if future is None:
+        future = loop.run_in_executor(
+            None, resource_loader.search_translation, key, locale
+        )
+        _pending[pending_key] = future
+        future.add_done_callback(lambda _: _pending.pop(pending_key, None))
+    # a cancelled caller must not cancel the search other callers await
+    await asyncio.shield(future)
+
+
+async def at(key, **kwargs):
+    """Asynchronous ``t``: load what the key needs, then translate it."""
+    locale = kwargs.pop("locale", None) or config.get_locale()
+    if translations.has(key, locale):
+        return translator.t(key, locale=locale, **kwargs)
+    resolution = translations.resolutions.get((locale, key))
+    if resolution is not None and resolution[1] == translations.generation:
+        return translator.translate(key, locale=resolution[0], **kwargs)
+    for candidate in translations.get_fallback_chain(locale):
+        if not translations.has(key, candidate):
+            if translations.is_missing(key, candidate):
+                continue
+            await aload(key, candidate)
+            if not translations.has(key, candidate):
+                translations.mark_missing(key, candidate)
+                continue
+        if candidate != locale:
+            translations.resolutions[(locale, key)] = (
+                candidate,
+                translations.generation,
+            )
+        return translator.translate(key, locale=candidate, **kwargs)
+    return translator._missing_translation(key, kwargs)
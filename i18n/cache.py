@@ -0,0 +1,73 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from . import config
+
+_MISSING = object()
+
+
+class LRUCache(object):
+    """Bounded mapping with optional expiry, sized from the settings.
+
+    ``size_setting`` and ``ttl_setting`` are configuration keys read when an
+    entry is stored, so changes made with ``config.set`` apply immediately.
+    """
+
+    def __init__(self, size_setting, ttl_setting=None):
+        super(LRUCache, self).__init__()
+        self.size_setting = size_setting
+        self.ttl_setting = ttl_setting
+        self.data = OrderedDict()
+        self.lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.data)
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def get(self, key, default=None):
+        entry = self.data.get(key)
+        if entry is None or entry[1] <= time.monotonic():
+            if entry is not None:
+                self.pop(key)
+            self.misses += 1
+            return default
+        self.hits += 1
+        try:
+            self.data.move_to_end(key)
+        except KeyError:
+            pass
+        return entry[0]
+
+    def set(self, key, value):
+        ttl = config.get(self.ttl_setting) if self.ttl_setting else None
+        expires = float("inf") if ttl is None else time.monotonic() + ttl
+        maxsize = config.get(self.size_setting)
+        with self.lock:
+            self.data[key] = (value, expires)
+            self.data.move_to_end(key)
+            while maxsize is not None and len(self.data) > maxsize:
+                self.data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self.lock:
+            entry = self.data.pop(key, None)
+        return default if entry is None else entry[0]
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        return {
+            "size": len(self.data),
+            "maxsize": config.get(self.size_setting),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
@@ -0,0 +1,226 @@
+import gc
+import marshal
+import mmap
+import struct
+import zlib
+from collections.abc import MutableMapping
+
+from . import translations
+from .disk_cache import write_atomic
+from .loaders.loader import I18nFileLoadError
+from .plurals import Plural
+
+MAGIC = b"I18NCAT1"
+EXTENSION = "i18nc"
+
+# magic, locale length, slot count, entry count
+HEADER = struct.Struct("<8sIII")
+# key hash, entry offset (0 marks an empty slot)
+SLOT = struct.Struct("<II")
+# key length, value length
+ENTRY = struct.Struct("<II")
+
+_ABSENT = object()
+_DELETED = object()
+
+
+def _hash(encoded_key):
+    return zlib.crc32(encoded_key) & 0xFFFFFFFF
+
+
+def dumps(translations_dic, locale, skipped=None):
+    """Serialize a flat ``{key: value}`` dictionary to the catalog format.
+
+    The file starts with a header and the locale name, followed by an open
+    addressing hash table of ``(hash, offset)`` slots and the entries, each
+    holding the UTF-8 key and its marshalled value, dictionaries being
+    plural forms. Values marshal cannot serialize raise an error, or are
+    put in ``skipped`` when it is given.
+    """
+    encoded_locale = locale.encode("utf-8")
+    encoded_values = {}
+    for key, value in translations_dic.items():
+        try:
+            # marshal only handles plain dictionaries
+            encoded_values[key] = marshal.dumps(
+                dict(value) if isinstance(value, Plural) else value
+            )
+        except ValueError:
+            if skipped is None:
+                raise I18nFileLoadError(
+                    "cannot compile value of key {0}: {1!r}".format(key, value)
+                )
+            skipped[key] = value
+    slot_count = 1
+    while slot_count < 2 * len(encoded_values):
+        slot_count *= 2
+    slots = [(0, 0)] * slot_count
+    offset = HEADER.size + len(encoded_locale) + slot_count * SLOT.size
+    entries = []
+    for key, encoded_value in encoded_values.items():
+        encoded_key = key.encode("utf-8")
+        key_hash = _hash(encoded_key)
+        index = key_hash & (slot_count - 1)
+        while slots[index][1]:
+            index = (index + 1) & (slot_count - 1)
+        slots[index] = (key_hash, offset)
+        entries.append(ENTRY.pack(len(encoded_key), len(encoded_value)))
+        entries.append(encoded_key)
+        entries.append(encoded_value)
+        offset += ENTRY.size + len(encoded_key) + len(encoded_value)
+    header = HEADER.pack(MAGIC, len(encoded_locale), slot_count, len(encoded_values))
+    return b"".join(
+        [header, encoded_locale] + [SLOT.pack(*slot) for slot in slots] + entries
+    )
+
+
+def dump(translations_dic, locale, filename):
+    write_atomic(filename, dumps(translations_dic, locale))
+
+
+class Catalog(MutableMapping):
+    """Read-only view of a compiled catalog with a writable overlay.
+
+    Values are decoded from the buffer the first time they are requested.
+    Keys added afterwards, for example with ``i18n.add_translation``, are
+    kept in the overlay and take precedence over the compiled entries.
+    """
+
+    def __init__(self, buffer, overlay=None):
+        super(Catalog, self).__init__()
+        magic, locale_length, self.slot_count, self.entry_count = HEADER.unpack_from(
+            buffer
+        )
+        if magic != MAGIC:
+            raise I18nFileLoadError("invalid catalog: bad magic number")
+        self.buffer = buffer
+        self.locale = bytes(buffer[HEADER.size : HEADER.size + locale_length]).decode(
+            "utf-8"
+        )
+        self.slots_offset = HEADER.size + locale_length
+        self.overlay = {} if overlay is None else overlay
+        self.decoded = {}
+
+    @classmethod
+    def open(cls, filename):
+        try:
+            with open(filename, "rb") as f:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (IOError, ValueError) as e:
+            raise I18nFileLoadError(
+                "error loading catalog {0}: {1}".format(filename, e)
+            )
+        return cls(buffer)
+
+    def _find(self, key):
+        encoded_key = key.encode("utf-8")
+        key_hash = _hash(encoded_key)
+        mask = self.slot_count - 1
+        index = key_hash & mask
+        buffer = self.buffer
+        while True:
+            slot_hash, offset = SLOT.unpack_from(
+                buffer, self.slots_offset + index * SLOT.size
+            )
+            if not offset:
+                return None
+            if slot_hash == key_hash:
+                key_length, value_length = ENTRY.unpack_from(buffer, offset)
+                start = offset + ENTRY.size
+                if buffer[start : start + key_length] == encoded_key:
+                    return start + key_length, value_length
+            index = (index + 1) & mask
+
+    def _iter_compiled(self):
+        buffer = self.buffer
+        offset = self.slots_offset + self.slot_count * SLOT.size
+        for _ in range(self.entry_count):
+            key_length, value_length = ENTRY.unpack_from(buffer, offset)
+            start = offset + ENTRY.size
+            yield bytes(buffer[start : start + key_length]).decode("utf-8")
+            offset = start + key_length + value_length
+
+    def __contains__(self, key):
+        value = self.overlay.get(key, _ABSENT)
+        if value is not _ABSENT:
+            return value is not _DELETED
+        return key in self.decoded or self._find(key) is not None
+
+    def __getitem__(self, key):
+        value = self.overlay.get(key, _ABSENT)
+        if value is not _ABSENT:
+            if value is _DELETED:
+                raise KeyError(key)
+            return value
+        try:
+            return self.decoded[key]
+        except KeyError:
+            pass
+        location = self._find(key)
+        if location is None:
+            raise KeyError(key)
+        start, length = location
+        value = marshal.loads(self.buffer[start : start + length])
+        if isinstance(value, dict):
+            value = Plural(value)
+        self.decoded[key] = value
+        return value
+
+    def __setitem__(self, key, value):
+        self.overlay[key] = value
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self.overlay[key] = _DELETED
+
+    def __iter__(self):
+        for key in self._iter_compiled():
+            if key not in self.overlay:
+                yield key
+        for key, value in list(self.overlay.items()):
+            if value is not _DELETED:
+                yield key
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def copy(self):
+        catalog = self.__class__(self.buffer, dict(self.overlay))
+        catalog.decoded = dict(self.decoded)
+        return catalog
+
+
+def compile_locale(locale, filename):
+    dump(dict(translations.container.get(locale, {})), locale, filename)
+
+
+def load_catalog(filename):
+    catalog = Catalog.open(filename)
+    with translations.write_lock:
+        current = translations.container.get(catalog.locale)
+        if current:
+            catalog.overlay.update(current)
+        translations.container[catalog.locale] = catalog
+    return catalog.locale
+
+
+def freeze():
+    """Pack every loaded locale into a catalog held in memory.
+
+    Meant to be called in a server's master process after preloading and
+    before forking workers. Translations then live in one bytes object per
+    locale, whose pages lookups never write to, so workers keep sharing
+    them instead of copying the dictionaries as reference counts change.
+    The objects left are moved out of the garbage collector's reach with
+    ``gc.freeze`` for the same reason.
+    """
+    with translations.write_lock:
+        for locale, table in list(translations.container.items()):
+            if isinstance(table, Catalog):
+                continue
+            skipped = {}
+            buffer = dumps(dict(table), locale, skipped)
+            translations.container[locale] = Catalog(buffer, skipped)
+    gc.collect()
+    gc.freeze()
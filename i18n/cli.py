@@ -0,0 +1,253 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from . import catalog, config, resource_loader, translations
+from .loaders.loader import I18nFileLoadError
+from .plurals import PLURAL_FORMS, Plural
+from .translator import TranslationFormatter
+
+
+def configure(args):
+    config.set("load_path", args.load_path)
+    for key in ("file_format", "filename_format", "encoding"):
+        if getattr(args, key) is not None:
+            config.set(key, getattr(args, key))
+    if args.skip_locale_root_data:
+        config.set("skip_locale_root_data", True)
+    if args.available_locale:
+        config.set("available_locales", args.available_locale)
+
+
+def _parse(settings, entry):
+    """Parse one file in a worker process, returning its flattened keys."""
+    config.settings.update(settings)
+    root_dir, path, locale = entry
+    start = time.perf_counter()
+    try:
+        translations_dic = resource_loader.parse_translation_file(
+            path, root_dir, locale
+        )
+        flattened = resource_loader._flatten_translation_file(path, translations_dic)
+    except Exception as e:
+        return None, str(e) or e.__class__.__name__, time.perf_counter() - start
+    return flattened, None, time.perf_counter() - start
+
+
+def parse_files(entries, jobs):
+    """Parse the files of ``entries`` in ``jobs`` processes.
+
+    Returns ``(flattened, error, seconds)`` for each entry, in order, where
+    ``flattened`` is None when the file could not be parsed.
+    """
+    if jobs == 1 or len(entries) < 2:
+        return [_parse(config.settings, entry) for entry in entries]
+    settings = dict(config.settings)
+    with ProcessPoolExecutor(jobs) as executor:
+        return list(executor.map(_parse, [settings] * len(entries), entries))
+
+
+def translation_files(locales):
+    """Return the entries of the files to parse, failing if there are none."""
+    entries = list(resource_loader.iter_translation_files(locales))
+    if not entries:
+        raise I18nFileLoadError(
+            "no translation files found in {0}".format(
+                ", ".join(config.get("load_path"))
+            )
+        )
+    return entries
+
+
+def compile_command(args):
+    entries = translation_files(args.locale)
+    if not os.path.isdir(args.output):
+        os.makedirs(args.output)
+    for entry, (flattened, error, _) in zip(entries, parse_files(entries, args.jobs)):
+        if flattened is None:
+            raise I18nFileLoadError(error)
+        translations.update(flattened, entry[2])
+    for locale in sorted(set(entry[2] for entry in entries)):
+        filename = os.path.join(
+            args.output, "{0}.{1}".format(locale, catalog.EXTENSION)
+        )
+        catalog.compile_locale(locale, filename)
+        print("{0}: {1}".format(locale, filename))
+    return 0
+
+
+def _placeholders(value):
+    if isinstance(value, dict):
+        names = set()
+        for form in value.values():
+            names.update(_placeholders(form))
+        # plural forms commonly leave the count out
+        names.discard("count")
+        return names
+    if not isinstance(value, str):
+        return set()
+    return set(
+        segment[0]
+        for segment in TranslationFormatter(value).segments
+        if segment.__class__ is tuple
+    )
+
+
+def check_translations(locales_keys, available_locales):
+    """Return the problems found in ``{locale: {key: value}}``.
+
+    Keys present in one of ``available_locales`` must be present in all of
+    them, plural forms must be valid and placeholders must match those of
+    the first available locale having the key.
+    """
+    errors = []
+    for locale, keys in sorted(locales_keys.items()):
+        for key, value in sorted(keys.items()):
+            if not isinstance(value, Plural):
+                continue
+            unknown = sorted(set(value) - PLURAL_FORMS)
+            if unknown:
+                errors.append(
+                    "{0} [{1}]: unknown plural forms {2}".format(
+                        key, locale, ", ".join(unknown)
+                    )
+                )
+            if "other" not in value and "many" not in value:
+                errors.append(
+                    "{0} [{1}]: plural without 'other' or 'many' form".format(
+                        key, locale
+                    )
+                )
+    all_keys = set()
+    for locale in available_locales:
+        all_keys.update(locales_keys.get(locale, ()))
+    for key in sorted(all_keys):
+        reference = None
+        for locale in available_locales:
+            keys = locales_keys.get(locale, {})
+            if key not in keys:
+                errors.append("{0} [{1}]: missing".format(key, locale))
+                continue
+            placeholders = _placeholders(keys[key])
+            if reference is None:
+                reference = (locale, placeholders)
+            elif placeholders != reference[1]:
+                errors.append(
+                    "{0} [{1}]: placeholders {2} differ from {3} in {4}".format(
+                        key,
+                        locale,
+                        sorted(placeholders),
+                        sorted(reference[1]),
+                        reference[0],
+                    )
+                )
+    return errors
+
+
+def validate_command(args):
+    entries = translation_files(args.locale)
+    start = time.perf_counter()
+    results = parse_files(entries, args.jobs)
+    elapsed = time.perf_counter() - start
+    errors = []
+    locales_keys = {}
+    for (root_dir, path, locale), (flattened, error, seconds) in zip(entries, results):
+        filename = os.path.join(root_dir, path)
+        if flattened is None:
+            errors.append("{0}: {1}".format(filename, error))
+            continue
+        print(
+            "{0} [{1}]: {2} keys, {3:.1f} ms".format(
+                filename, locale, len(flattened), seconds * 1000
+            )
+        )
+        locales_keys.setdefault(locale, {}).update(flattened)
+    # --locale narrows the check to the locales parsed, never adds to them
+    available_locales = [
+        locale
+        for locale in config.get("available_locales")
+        if args.locale is None or locale in args.locale
+    ]
+    errors.extend(check_translations(locales_keys, available_locales))
+    for error in errors:
+        print("error: {0}".format(error), file=sys.stderr)
+    print(
+        "{0} files, {1} keys, {2} errors in {3:.2f} s".format(
+            len(entries),
+            sum(len(keys) for keys in locales_keys.values()),
+            len(errors),
+            elapsed,
+        )
+    )
+    return 1 if errors else 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="i18n")
+    parser.add_argument(
+        "-p",
+        "--load-path",
+        action="append",
+        required=True,
+        help="directory containing translation files, may be repeated",
+    )
+    parser.add_argument("--file-format", help="extension of translation files")
+    parser.add_argument("--filename-format", help="format of translation filenames")
+    parser.add_argument("--encoding", help="encoding of translation files")
+    parser.add_argument(
+        "--skip-locale-root-data",
+        action="store_true",
+        help="translation files do not have the locale as root element",
+    )
+    parser.add_argument(
+        "-a",
+        "--available-locale",
+        action="append",
+        help="locale every key must be translated to, may be repeated",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="number of processes parsing files (default: number of CPUs)",
+    )
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.required = True
+
+    compile_parser = subparsers.add_parser(
+        "compile", help="compile translation files to binary catalogs"
+    )
+    compile_parser.add_argument(
+        "-l", "--locale", action="append", help="locale to compile, may be repeated"
+    )
+    compile_parser.add_argument(
+        "-o", "--output", required=True, help="directory to write catalogs to"
+    )
+    compile_parser.set_defaults(func=compile_command)
+
+    validate_parser = subparsers.add_parser(
+        "validate",
+        help="parse translation files and check that locales are consistent",
+    )
+    validate_parser.add_argument(
+        "-l", "--locale", action="append", help="locale to check, may be repeated"
+    )
+    validate_parser.set_defaults(func=validate_command)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    configure(args)
+    try:
+        return args.func(args)
+    except I18nFileLoadError as e:
+        print("error: {0}".format(e), file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
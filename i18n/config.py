@@ -1,14 +1,11 @@
-try:
-    __import__("yaml")
-    yaml_available = True
-except ImportError:
-    yaml_available = False
-
-try:
-    __import__("json")
-    json_available = True
-except ImportError:
-    json_available = False
+import functools
+from contextvars import ContextVar
+from importlib.util import find_spec
+
+# checked without importing the parsers, which are only imported when a file
+# needing them is first loaded
+yaml_available = find_spec("yaml") is not None
+json_available = find_spec("json") is not None
 
 settings = {
     "filename_format": "{namespace}.{locale}.{format}",
@@ -17,6 +14,7 @@ settings = {
     "load_path": [],
     "locale": "en",
     "fallback": "en",
+    "fallback_chains": {},
     "placeholder_delimiter": "%",
     "error_on_missing_translation": False,
     "error_on_missing_placeholder": False,
@@ -26,6 +24,23 @@ settings = {
     "plural_few": 5,
     "skip_locale_root_data": False,
     "enable_memoization": False,
+    "memoization_size": 512,
+    "cache_dir": None,
+    "partial_loading_threshold": None,
+    "yaml_loader": "auto",
+    "compact_storage": False,
+    "enable_lazy_loading": True,
+    "index_refresh_interval": 1.0,
+    "reload_interval": 2.0,
+    "enable_render_cache": False,
+    "render_cache_size": 4096,
+    "render_cache_ttl": None,
+    "formatter_cache_size": 4096,
+    "enable_stats": False,
+    "stats_sample_rate": 0.01,
+    "enable_missing_cache": False,
+    "missing_cache_size": 10000,
+    "missing_cache_ttl": None,
 }
 
 
@@ -35,3 +50,63 @@ def set(key, value):
 
 def get(key):
     return settings[key]
+
+
+_current_locale = ContextVar("i18n_locale", default=None)
+# tokens of the ``use_locale`` blocks entered in the context, innermost last
+_use_locale_tokens = ContextVar("i18n_use_locale_tokens")
+
+
+def get_locale():
+    """Return the locale of the current context, or the ``locale`` setting."""
+    locale = _current_locale.get()
+    return settings["locale"] if locale is None else locale
+
+
+def set_locale(locale):
+    """Set the locale of the current context and return a token to reset it.
+
+    Each thread and each asyncio task has its own context, so setting the
+    locale here does not affect concurrent requests.
+    """
+    return _current_locale.set(locale)
+
+
+def reset_locale(token):
+    _current_locale.reset(token)
+
+
+class use_locale(object):
+    """Context manager, or decorator, setting the locale of the context."""
+
+    def __init__(self, locale):
+        self.locale = locale
+
+    def __enter__(self):
+        tokens = _use_locale_tokens.get(())
+        _use_locale_tokens.set(tokens + (set_locale(self.locale),))
+        return self.locale
+
+    def __exit__(self, *exc_info):
+        tokens = _use_locale_tokens.get()
+        _use_locale_tokens.set(tokens[:-1])
+        reset_locale(tokens[-1])
+
+    def __call__(self, function):
+        import inspect
+
+        if inspect.iscoroutinefunction(function):
+
+            @functools.wraps(function)
+            async def async_wrapper(*args, **kwargs):
+                with use_locale(self.locale):
+                    return await function(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with use_locale(self.locale):
+                return function(*args, **kwargs)
+
+        return wrapper
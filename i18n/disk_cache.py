@@ -0,0 +1,82 @@
+import marshal
+import os
+import sys
+
+from . import config
+
+EXTENSION = "marshal"
+
+
+def make_key(loader, filename, file_content, root_data):
+    """Return the cache key of the data parsed from ``file_content``.
+
+    The key covers the path, a digest of the content, the root data and
+    the loader, so an entry is never used for a file that changed since.
+    """
+    import hashlib
+
+    content_digest = hashlib.sha1(file_content.encode("utf-8")).hexdigest()
+    parts = (
+        sys.implementation.cache_tag,
+        loader.__class__.__name__,
+        os.path.abspath(filename),
+        content_digest,
+        repr(root_data),
+    )
+    return hashlib.sha1("\0".join(parts).encode("utf-8")).hexdigest()
+
+
+def _path(key):
+    return os.path.join(config.get("cache_dir"), "{0}.{1}".format(key, EXTENSION))
+
+
+def load(key):
+    """Return the data cached under ``key``, or None."""
+    try:
+        with open(_path(key), "rb") as f:
+            return marshal.load(f)
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+
+
+def store(key, data):
+    """Cache ``data`` under ``key``, skipping data marshal cannot handle."""
+    try:
+        encoded = marshal.dumps(data)
+    except ValueError:
+        return
+    try:
+        os.makedirs(config.get("cache_dir"), exist_ok=True)
+        write_atomic(_path(key), encoded)
+    except OSError:
+        pass
+
+
+def write_atomic(filename, data):
+    """Write ``data`` to a temporary file, then move it over ``filename``."""
+    import tempfile
+
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, tmp_filename = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_filename, filename)
+    except BaseException:
+        os.unlink(tmp_filename)
+        raise
+
+
+def clear():
+    """Remove every entry from the ``cache_dir`` directory."""
+    cache_dir = config.get("cache_dir")
+    try:
+        filenames = os.listdir(cache_dir)
+    except OSError:
+        return
+    for filename in filenames:
+        if filename.endswith("." + EXTENSION):
+            try:
+                os.unlink(os.path.join(cache_dir, filename))
+            except OSError:
+                pass
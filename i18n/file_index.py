@@ -0,0 +1,174 @@
+import os
+import re
+import threading
+import time
+from string import Formatter
+
+from . import config
+
+# root directory -> {relative directory: (mtime, index keys of its files)}
+directories = {}
+# root directory -> {(namespace parts, locale, format): relative file path}
+# A published dictionary is never modified: rescans build an updated copy
+# and replace it, so readers can iterate it without locking.
+files = {}
+last_refresh = {}
+_patterns = {}
+_signature = None
+_lock = threading.RLock()
+
+
+def get_filename_pattern():
+    filename_format = config.get("filename_format")
+    pattern = _patterns.get(filename_format)
+    if pattern is None:
+        parts = []
+        for literal, field, _, _ in Formatter().parse(filename_format):
+            parts.append(re.escape(literal))
+            if field is not None:
+                parts.append("(?P<{0}>[^.]+)".format(field))
+        pattern = _patterns[filename_format] = re.compile("".join(parts) + "$")
+    return pattern
+
+
+def _check_signature():
+    global _signature
+    signature = (config.get("filename_format"), tuple(config.get("load_path")))
+    if signature != _signature:
+        clear()
+        _signature = signature
+
+
+def clear():
+    directories.clear()
+    files.clear()
+    last_refresh.clear()
+
+
+def _scan_directory(root_dir, directory, pattern, root_files):
+    path = os.path.join(root_dir, directory)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+        entries = sorted(os.listdir(path))
+    except OSError:
+        return
+    keys = []
+    base = tuple(directory.split(os.sep)) if directory else ()
+    for entry in entries:
+        relative_path = os.path.join(directory, entry)
+        if os.path.isdir(os.path.join(root_dir, relative_path)):
+            if relative_path not in directories[root_dir]:
+                _scan_directory(root_dir, relative_path, pattern, root_files)
+            continue
+        match = pattern.match(entry)
+        if match is None:
+            continue
+        fields = match.groupdict()
+        parts = base + (fields["namespace"],) if "namespace" in fields else base
+        file_format = fields.get("format") or os.path.splitext(entry)[1][1:]
+        key = (parts, fields.get("locale"), file_format)
+        root_files[key] = relative_path
+        keys.append(key)
+    directories[root_dir][directory] = (mtime, keys)
+
+
+def _forget_directory(root_dir, directory, root_files):
+    _, keys = directories[root_dir].pop(directory)
+    for key in keys:
+        root_files.pop(key, None)
+
+
+def refresh(root_dir=None):
+    """Rescan the directories whose modification time changed."""
+    _check_signature()
+    root_dirs = list(directories) if root_dir is None else [root_dir]
+    pattern = get_filename_pattern()
+    with _lock:
+        for root_dir in root_dirs:
+            _refresh_root(root_dir, pattern)
+
+
+def _refresh_root(root_dir, pattern):
+    if root_dir not in directories:
+        return
+    root_files = dict(files.get(root_dir, ()))
+    for directory, (mtime, _) in list(directories[root_dir].items()):
+        if directory not in directories[root_dir]:
+            continue
+        try:
+            current_mtime = os.stat(os.path.join(root_dir, directory)).st_mtime_ns
+        except OSError:
+            current_mtime = None
+        if current_mtime == mtime:
+            continue
+        _forget_directory(root_dir, directory, root_files)
+        if current_mtime is None:
+            prefix = directory + os.sep
+            for subdirectory in list(directories[root_dir]):
+                if subdirectory.startswith(prefix):
+                    _forget_directory(root_dir, subdirectory, root_files)
+        else:
+            _scan_directory(root_dir, directory, pattern, root_files)
+    files[root_dir] = root_files
+    last_refresh[root_dir] = time.monotonic()
+
+
+def get_files(root_dir):
+    _check_signature()
+    root_files = files.get(root_dir)
+    if root_files is None:
+        with _lock:
+            root_files = files.get(root_dir)
+            if root_files is None:
+                directories[root_dir] = {}
+                root_files = {}
+                _scan_directory(root_dir, "", get_filename_pattern(), root_files)
+                files[root_dir] = root_files
+                last_refresh[root_dir] = time.monotonic()
+    return root_files
+
+
+def _lookup_fields(locale):
+    fields = get_filename_pattern().groupindex
+    return (
+        locale if "locale" in fields else None,
+        config.get("file_format"),
+    )
+
+
+def find(root_dir, directory, splitted_namespace, locale):
+    """Return the file holding the given namespace, relative to ``root_dir``.
+
+    Like a search through the directory tree, the file closest to the root
+    wins. When nothing is found the directories are rescanned, at most once
+    every ``index_refresh_interval`` seconds.
+    """
+    locale, file_format = _lookup_fields(locale)
+    with_namespace = "{namespace}" in config.get("filename_format")
+    base = tuple(directory.split(os.sep)) if directory else ()
+    for attempt in range(2):
+        root_files = get_files(root_dir)
+        for depth in range(len(splitted_namespace)):
+            parts = base + tuple(
+                splitted_namespace[: depth + 1 if with_namespace else depth]
+            )
+            path = root_files.get((parts, locale, file_format))
+            if path is not None:
+                return path
+        interval = config.get("index_refresh_interval")
+        if (
+            attempt
+            or interval is None
+            or time.monotonic() - last_refresh.get(root_dir, 0) < interval
+        ):
+            return None
+        refresh(root_dir)
+
+
+def find_in_directory(root_dir, locale):
+    locale, file_format = _lookup_fields(locale)
+    return sorted(
+        path
+        for (parts, file_locale, path_format), path in get_files(root_dir).items()
+        if not parts and file_locale == locale and path_format == file_format
+    )
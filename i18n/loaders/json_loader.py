@@ -1,16 +1,129 @@
+import io
 import json
+import os
 
+from .. import config
 from .loader import I18nFileLoadError, Loader
 
+WHITESPACE = " \t\n\r"
+
 
 class JsonLoader(Loader):
     """class to load yaml files"""
 
     def __init__(self):
         super(JsonLoader, self).__init__()
+        # (path, root_data) -> ((mtime, size) of the file, subtree offsets)
+        self.indexes = {}
 
     def parse_file(self, file_content):
         try:
             return json.loads(file_content)
         except ValueError as e:
             raise I18nFileLoadError("invalid JSON: {0}".format(str(e)))
+
+    def index_file(self, filename, root_data):
+        """Return ``{name: (start, end)}``, the byte offsets of the members of
+        the file's top-level object, or of its ``root_data`` member.
+
+        The file is read and scanned once; the index is kept until the
+        file's modification time or size changes.
+        """
+        stat = os.stat(filename)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        cached = self.indexes.get((filename, root_data))
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        text = self._load_file_data(filename)
+        try:
+            position = _skip_whitespace(text, 0)
+            offsets = _scan_members(text, position, root_data)
+        except ValueError as e:
+            raise I18nFileLoadError("invalid JSON: {0}".format(str(e)))
+        if offsets is None:
+            raise I18nFileLoadError(
+                "error getting data from {0}: {1} not defined".format(
+                    filename, root_data
+                )
+            )
+        index = _to_byte_offsets(text, offsets, config.get("encoding"))
+        self.indexes[(filename, root_data)] = (signature, index)
+        return index
+
+    def load_subtree(self, filename, root_data, name):
+        """Parse only the ``name`` member of the indexed object, or return
+        None when it has no such member."""
+        offsets = self.index_file(filename, root_data).get(name)
+        if offsets is None:
+            return None
+        start, end = offsets
+        try:
+            with io.open(filename, "rb") as f:
+                f.seek(start)
+                content = f.read(end - start).decode(config.get("encoding"))
+        except IOError as e:
+            raise I18nFileLoadError(
+                "error loading file {0}: {1}".format(filename, e.strerror)
+            )
+        return self.parse_file(content)
+
+    def invalidate(self, filename):
+        super(JsonLoader, self).invalidate(filename)
+        for key in list(self.indexes):
+            if key[0] == filename:
+                self.indexes.pop(key, None)
+
+
+def _scan_members(text, position, descend=None):
+    """Return ``[(name, (start, end))]`` for the members of the object
+    starting at ``position``, with the offsets of their values in ``text``.
+
+    With ``descend``, return the members of the object's ``descend`` member
+    instead, or None when there is no such member.
+    """
+    decoder = json.JSONDecoder()
+    if text[position : position + 1] != "{":
+        raise ValueError("expected an object at character {0}".format(position))
+    members = []
+    position = _skip_whitespace(text, position + 1)
+    if text[position : position + 1] == "}":
+        return None if descend is not None else members
+    while True:
+        if text[position : position + 1] != '"':
+            raise ValueError("expected a name at character {0}".format(position))
+        name, position = decoder.raw_decode(text, position)
+        position = _skip_whitespace(text, position)
+        if text[position : position + 1] != ":":
+            raise ValueError("expected ':' at character {0}".format(position))
+        start = _skip_whitespace(text, position + 1)
+        if descend is not None and name == descend:
+            return _scan_members(text, start)
+        # the value is decoded only to find where it ends, then dropped
+        _, end = decoder.raw_decode(text, start)
+        members.append((name, (start, end)))
+        position = _skip_whitespace(text, end)
+        separator = text[position : position + 1]
+        position += 1
+        if separator == "}":
+            return None if descend is not None else members
+        if separator != ",":
+            raise ValueError("expected ',' at character {0}".format(position - 1))
+        position = _skip_whitespace(text, position)
+
+
+def _skip_whitespace(text, position):
+    while position < len(text) and text[position] in WHITESPACE:
+        position += 1
+    return position
+
+
+def _to_byte_offsets(text, offsets, encoding):
+    index = {}
+    character = byte = 0
+    for name, (start, end) in offsets:
+        byte += len(text[character:start].encode(encoding))
+        byte_start = byte
+        byte += len(text[start:end].encode(encoding))
+        character = end
+        index[name] = (byte_start, byte)
+    return index
@@ -1,6 +1,8 @@
 import io
+import os
 
-from .. import config
+from .. import config, disk_cache
+from ..cache import LRUCache
 
 
 class I18nFileLoadError(Exception):
@@ -16,7 +18,8 @@ class Loader(object):
 
     def __init__(self):
         super(Loader, self).__init__()
-        self.memoization_dict = {}
+        # (path, root_data) -> ((mtime, size) of the file, parsed data)
+        self.cache = LRUCache("memoization_size")
 
     def _load_file_data(self, filename):
         try:
@@ -28,13 +31,16 @@ class Loader(object):
             )
 
     def load_file(self, filename):
-        enable_memoization = config.get("enable_memoization")
-        if enable_memoization:
-            if filename not in self.memoization_dict:
-                self.memoization_dict[filename] = self._load_file_data(filename)
-            return self.memoization_dict[filename]
-        else:
-            return self._load_file_data(filename)
+        """Return the content of the file, given to ``parse_file``."""
+        return self._load_file_data(filename)
+
+    def clear(self):
+        self.cache.clear()
+
+    def invalidate(self, filename):
+        for key in list(self.cache.data):
+            if key[0] == filename:
+                self.cache.pop(key)
 
     def parse_file(self, file_content):
         raise NotImplementedError(
@@ -50,7 +56,29 @@ class Loader(object):
         return data if root_data is None else data[root_data]
 
     def load_resource(self, filename, root_data):
+        if not config.get("enable_memoization"):
+            return self._load_resource(filename, root_data)
+        try:
+            stat = os.stat(filename)
+            signature = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            signature = None
+        cached = self.cache.get((filename, root_data))
+        # a file removed since it was cached is still served from memory
+        if cached is not None and signature in (cached[0], None):
+            return cached[1]
+        data = self._load_resource(filename, root_data)
+        self.cache.set((filename, root_data), (signature, data))
+        return data
+
+    def _load_resource(self, filename, root_data):
         file_content = self.load_file(filename)
+        cache_key = None
+        if config.get("cache_dir") is not None and isinstance(file_content, str):
+            cache_key = disk_cache.make_key(self, filename, file_content, root_data)
+            data = disk_cache.load(cache_key)
+            if data is not None:
+                return data
         data = self.parse_file(file_content)
         if not self.check_data(data, root_data):
             raise I18nFileLoadError(
@@ -58,4 +86,7 @@ class Loader(object):
                     filename, root_data
                 )
             )
-        return self.get_data(data, root_data)
+        data = self.get_data(data, root_data)
+        if cache_key is not None:
+            disk_cache.store(cache_key, data)
+        return data
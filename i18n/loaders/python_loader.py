@@ -1,24 +1,54 @@
-import os.path
-import sys
+import os
+import re
+from importlib.util import module_from_spec, spec_from_file_location
 
 from .loader import I18nFileLoadError, Loader
 
 
 class PythonLoader(Loader):
-    """class to load python files"""
+    """class to load python files
+
+    Files are executed by path in a fresh module that is not added to
+    ``sys.modules``, so ``sys.path`` is left alone and files with the same
+    name in different directories do not collide. Their compiled code is
+    kept, keyed by path, modification time and size.
+    """
 
     def __init__(self):
         super(PythonLoader, self).__init__()
-
-    def load_file(self, filename):
-        path, name = os.path.split(filename)
-        module_name, ext = os.path.splitext(name)
-        if path not in sys.path:
-            sys.path.append(path)
+        # path -> ((mtime, size) of the file, code object)
+        self.code_cache = {}
+
+    def _get_code(self, filename, spec):
+        stat = os.stat(filename)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        cached = self.code_cache.get(filename)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        code = spec.loader.get_code(spec.name)
+        self.code_cache[filename] = (signature, code)
+        return code
+
+    # the "content" of a Python file is the module, which parse_file returns
+    def load_file(self, filename):  # pyright: ignore[reportIncompatibleMethodOverride]
+        module_name = "i18n._catalogs." + re.sub(
+            r"\W", "_", os.path.splitext(os.path.basename(filename))[0]
+        )
+        spec = spec_from_file_location(module_name, filename)
+        if spec is None:
+            raise I18nFileLoadError("error loading file {0}".format(filename))
+        module = module_from_spec(spec)
         try:
-            return __import__(module_name)
-        except ImportError:
+            exec(self._get_code(filename, spec), module.__dict__)
+        except (OSError, ImportError):
             raise I18nFileLoadError("error loading file {0}".format(filename))
+        except Exception as e:
+            raise I18nFileLoadError("error loading file {0}: {1}".format(filename, e))
+        return module
+
+    def invalidate(self, filename):
+        super(PythonLoader, self).invalidate(filename)
+        self.code_cache.pop(filename, None)
 
     def parse_file(self, file_content):
         return file_content
@@ -1,8 +1,29 @@
 import yaml
 
+from .. import config
 from .loader import I18nFileLoadError, Loader
 
 
+def get_yaml_loader():
+    """Return the PyYAML loader class selected by the ``yaml_loader`` setting.
+
+    ``auto`` uses the libyaml based ``CSafeLoader`` when PyYAML was built
+    with it and ``SafeLoader`` otherwise, ``c`` requires libyaml and
+    ``python`` always uses ``SafeLoader``.
+    """
+    choice = config.get("yaml_loader")
+    c_loader = getattr(yaml, "CSafeLoader", None)
+    if choice == "python":
+        return yaml.SafeLoader
+    if choice == "c":
+        if c_loader is None:
+            raise I18nFileLoadError("PyYAML was built without libyaml")
+        return c_loader
+    if choice == "auto":
+        return c_loader or yaml.SafeLoader
+    raise I18nFileLoadError("unknown yaml_loader setting {0!r}".format(choice))
+
+
 class YamlLoader(Loader):
     """class to load yaml files"""
 
@@ -10,8 +31,8 @@ class YamlLoader(Loader):
         super(YamlLoader, self).__init__()
 
     def parse_file(self, file_content):
+        loader = get_yaml_loader()
         try:
-            loader = getattr(yaml, "FullLoader", yaml.SafeLoader)
             return yaml.load(file_content, Loader=loader)
         except Exception as e:
             raise I18nFileLoadError("invalid YAML: {0}".format(str(e)))
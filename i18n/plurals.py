@@ -0,0 +1,230 @@
+import re
+from decimal import Decimal
+
+from . import config
+
+PLURAL_FORMS = frozenset(("zero", "one", "two", "few", "many", "other"))
+# forms that make a dictionary of a file a plural when two of them are in it;
+# "two" is left out, as keys like "one", "two", "three" are ordinal names too
+DETECTED_FORMS = PLURAL_FORMS - {"two"}
+
+# CLDR plural rules of a few languages, without the rules for compact
+# decimal numbers. Register them with ``register(locale)``.
+CLDR_RULES = {
+    "ar": {
+        "zero": "n = 0",
+        "one": "n = 1",
+        "two": "n = 2",
+        "few": "n % 100 = 3..10",
+        "many": "n % 100 = 11..99",
+    },
+    "cs": {"one": "i = 1 and v = 0", "few": "i = 2..4 and v = 0", "many": "v != 0"},
+    "de": {"one": "i = 1 and v = 0"},
+    "en": {"one": "i = 1 and v = 0"},
+    "es": {"one": "n = 1"},
+    "fr": {"one": "i = 0,1"},
+    "ja": {},
+    "pl": {
+        "one": "i = 1 and v = 0",
+        "few": "v = 0 and i % 10 = 2..4 and i % 100 != 12..14",
+        "many": "v = 0 and i != 1 and i % 10 = 0..1"
+        " or v = 0 and i % 10 = 5..9"
+        " or v = 0 and i % 100 = 12..14",
+    },
+    "ru": {
+        "one": "v = 0 and i % 10 = 1 and i % 100 != 11",
+        "few": "v = 0 and i % 10 = 2..4 and i % 100 != 12..14",
+        "many": "v = 0 and i % 10 = 0"
+        " or v = 0 and i % 10 = 5..9"
+        " or v = 0 and i % 100 = 11..14",
+    },
+    "uk": {
+        "one": "v = 0 and i % 10 = 1 and i % 100 != 11",
+        "few": "v = 0 and i % 10 = 2..4 and i % 100 != 12..14",
+        "many": "v = 0 and i % 10 = 0"
+        " or v = 0 and i % 10 = 5..9"
+        " or v = 0 and i % 100 = 11..14",
+    },
+    "zh": {},
+}
+
+# locale -> rule, a callable returning the plural form of a count
+rules = {}
+_resolved = {}
+
+_TOKEN = re.compile(r"\s*(?:(\d+)|(\.\.|!=|=|%|,)|([a-z]+))")
+_OPERANDS = frozenset("nivwft")
+
+
+class Plural(dict):
+    """Plural forms of a translation, tagged as such when files are loaded."""
+
+    __slots__ = ()
+
+
+def legacy_rule(count):
+    """Default rule: ``zero``, ``one``, then ``few`` up to ``plural_few``."""
+    if count == 0:
+        return "zero"
+    if count == 1:
+        return "one"
+    if count <= config.get("plural_few"):
+        return "few"
+    return "other"
+
+
+def operands(count):
+    """Return the CLDR operands ``n, i, v, w, f, t`` of a number."""
+    if isinstance(count, int):
+        count = abs(count)
+        return count, count, 0, 0, 0, 0
+    # without an exponent, which str() uses for floats like 1e-05
+    text = format(Decimal(str(abs(count))), "f")
+    integer, _, fraction = text.partition(".")
+    significant = fraction.rstrip("0")
+    return (
+        abs(count),
+        int(integer),
+        len(fraction),
+        len(significant),
+        int(fraction or 0),
+        int(significant or 0),
+    )
+
+
+def _match(value, ranges):
+    for low, high in ranges:
+        if low <= value <= high and (low == high or value % 1 == 0):
+            return True
+    return False
+
+
+class _Parser(object):
+    def __init__(self, expression):
+        self.expression = expression
+        self.tokens = []
+        position = 0
+        expression = expression.split("@")[0].rstrip()
+        while position < len(expression):
+            match = _TOKEN.match(expression, position)
+            if match is None or match.lastindex is None:
+                self.error()
+            self.tokens.append(match.group(match.lastindex))
+            position = match.end()
+        self.position = 0
+
+    def error(self):
+        raise ValueError("invalid plural rule: {0!r}".format(self.expression))
+
+    def peek(self):
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return None
+
+    def take(self, *expected):
+        token = self.peek()
+        if token is None or (expected and token not in expected):
+            self.error()
+        self.position += 1
+        return token
+
+    def integer(self):
+        token = self.take()
+        if not token.isdigit():
+            self.error()
+        return int(token)
+
+    def parse(self):
+        if not self.tokens:
+            return "True"
+        condition = self.condition()
+        if self.peek() is not None:
+            self.error()
+        return condition
+
+    def condition(self):
+        conditions = [self.and_condition()]
+        while self.peek() == "or":
+            self.take()
+            conditions.append(self.and_condition())
+        return " or ".join(conditions)
+
+    def and_condition(self):
+        relations = [self.relation()]
+        while self.peek() == "and":
+            self.take()
+            relations.append(self.relation())
+        return " and ".join(relations)
+
+    def relation(self):
+        operand = self.take()
+        if operand not in _OPERANDS:
+            self.error()
+        expression = operand
+        if self.peek() in ("%", "mod"):
+            self.take()
+            expression = "{0} % {1}".format(operand, self.integer())
+        negated = self.take("=", "!=") == "!="
+        ranges = [self.range()]
+        while self.peek() == ",":
+            self.take()
+            ranges.append(self.range())
+        return "{0}_match({1}, {2!r})".format(
+            "not " if negated else "", expression, tuple(ranges)
+        )
+
+    def range(self):
+        low = self.integer()
+        if self.peek() == "..":
+            self.take()
+            return low, self.integer()
+        return low, low
+
+
+def compile_rule(forms):
+    """Compile CLDR conditions, ``{form: condition}``, to a rule.
+
+    Conditions are tried in order and ``other`` is returned when none
+    matches. The supported syntax is the operands ``n i v w f t``, ``%``,
+    ``=`` and ``!=`` against lists of values and ranges, ``and`` and ``or``.
+    """
+    lines = ["def rule(count):", "    n, i, v, w, f, t = operands(count)"]
+    for form, condition in forms.items():
+        if form not in PLURAL_FORMS:
+            raise ValueError("unknown plural form: {0}".format(form))
+        lines.append("    if {0}:".format(_Parser(condition).parse()))
+        lines.append("        return {0!r}".format(form))
+    lines.append("    return 'other'")
+    namespace = {"operands": operands, "_match": _match}
+    exec("\n".join(lines), namespace)
+    return namespace["rule"]
+
+
+def register(locale, rule=None):
+    """Set the plural rule of ``locale``.
+
+    ``rule`` is a callable returning the form of a count or a dictionary of
+    CLDR conditions, compiled here once. It defaults to the CLDR rules of
+    the locale's language.
+    """
+    if rule is None:
+        rule = CLDR_RULES[_language(locale)]
+    if not callable(rule):
+        rule = compile_rule(rule)
+    rules[locale] = rule
+    _resolved.clear()
+
+
+def _language(locale):
+    return re.split("[-_]", locale, 1)[0]
+
+
+def get_rule(locale):
+    """Return the rule of the locale, or of its language, or ``legacy_rule``."""
+    rule = _resolved.get(locale)
+    if rule is None:
+        rule = rules.get(locale)
+        if rule is None and locale:
+            rule = rules.get(_language(locale))
+        rule = _resolved[locale] = rule or legacy_rule
+    return rule
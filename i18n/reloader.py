@@ -0,0 +1,67 @@
+import os
+import threading
+
+from . import config, file_index, resource_loader
+
+_watcher = None
+
+
+def check():
+    """Reload the translation files modified since they were loaded.
+
+    Files that fail to load keep their previous translations. Returns the
+    paths of the reloaded files.
+    """
+    file_index.refresh()
+    reloaded = []
+    for (path, locale), loaded_file in list(resource_loader.loaded_files.items()):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        if (stat.st_mtime_ns, stat.st_size) == (loaded_file.mtime, loaded_file.size):
+            continue
+        try:
+            resource_loader.reload_translation_file(
+                loaded_file.filename, loaded_file.base_directory, locale
+            )
+        except resource_loader.I18nFileLoadError:
+            # keep serving the previous translations until the file is fixed
+            continue
+        reloaded.append(path)
+    return reloaded
+
+
+class Watcher(threading.Thread):
+    """Daemon thread calling ``check`` every ``interval`` seconds."""
+
+    def __init__(self, interval):
+        super(Watcher, self).__init__(name="i18n-reloader")
+        self.daemon = True
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            check()
+
+    def stop(self):
+        self.stopped.set()
+
+
+def start(interval=None):
+    global _watcher
+    stop()
+    if interval is None:
+        interval = config.get("reload_interval")
+    _watcher = Watcher(interval)
+    _watcher.start()
+    return _watcher
+
+
+def stop():
+    global _watcher
+    if _watcher is not None:
+        _watcher.stop()
+        _watcher.join()
+        _watcher = None
@@ -1,11 +1,31 @@
+import importlib
 import os.path
+import sys
+import threading
+import time
+from collections import namedtuple
 
-from . import config, translations
+from . import config, file_index, stats, translations
 from .loaders.loader import I18nFileLoadError
+from .plurals import DETECTED_FORMS, Plural
 
 loaders = {}
+# extension -> (module, class name, extensions) of the loaders imported the
+# first time a file with that extension is loaded
+lazy_loaders = {}
+_lazy_loaders_lock = threading.Lock()
 
-PLURALS = ["zero", "one", "few", "many", "other"]
+# (path, locale) -> LoadedFile for every translation file loaded so far
+loaded_files = {}
+# (path, locale) -> names of the subtrees loaded from a partially loaded file
+loaded_subtrees = {}
+
+_loading = {}
+_loading_lock = threading.Lock()
+
+LoadedFile = namedtuple(
+    "LoadedFile", ["filename", "base_directory", "locale", "mtime", "size", "keys"]
+)
 
 
 def register_loader(loader_class, supported_extensions):
@@ -16,13 +36,48 @@ def register_loader(loader_class, supported_extensions):
         loaders[extension] = loader_class()
 
 
-def load_resource(filename, root_data):
-    extension = os.path.splitext(filename)[1][1:]
-    if extension not in loaders:
+def register_lazy_loader(module_name, class_name, supported_extensions):
+    """Register a loader class to import when it is first needed.
+
+    ``module_name`` may be relative to the ``i18n`` package.
+    """
+    supported_extensions = tuple(supported_extensions)
+    for extension in supported_extensions:
+        loaders.pop(extension, None)
+        lazy_loaders[extension] = (module_name, class_name, supported_extensions)
+
+
+def get_loader(extension):
+    loader = loaders.get(extension)
+    if loader is not None:
+        return loader
+    if extension not in lazy_loaders:
         raise I18nFileLoadError(
             "no loader available for extension {0}".format(extension)
         )
-    return getattr(loaders[extension], "load_resource")(filename, root_data)
+    with _lazy_loaders_lock:
+        if extension not in loaders:
+            module_name, class_name, supported_extensions = lazy_loaders[extension]
+            module = importlib.import_module(module_name, __package__)
+            register_loader(getattr(module, class_name), supported_extensions)
+    return loaders[extension]
+
+
+def load_resource(filename, root_data):
+    extension = os.path.splitext(filename)[1][1:]
+    loader = get_loader(extension)
+    if not config.get("enable_stats"):
+        return getattr(loader, "load_resource")(filename, root_data)
+    start = time.perf_counter()
+    data = getattr(loader, "load_resource")(filename, root_data)
+    stats.record_load(filename, loader, time.perf_counter() - start)
+    return data
+
+
+def invalidate_resource(filename):
+    extension = os.path.splitext(filename)[1][1:]
+    if extension in loaders:
+        loaders[extension].invalidate(filename)
 
 
 def init_loaders():
@@ -34,21 +89,15 @@ def init_loaders():
 
 
 def init_python_loader():
-    from .loaders.python_loader import PythonLoader
-
-    register_loader(PythonLoader, ["py"])
+    register_lazy_loader(".loaders.python_loader", "PythonLoader", ["py"])
 
 
 def init_yaml_loader():
-    from .loaders.yaml_loader import YamlLoader
-
-    register_loader(YamlLoader, ["yml", "yaml"])
+    register_lazy_loader(".loaders.yaml_loader", "YamlLoader", ["yml", "yaml"])
 
 
 def init_json_loader():
-    from .loaders.json_loader import JsonLoader
-
-    register_loader(JsonLoader, ["json"])
+    register_lazy_loader(".loaders.json_loader", "JsonLoader", ["json"])
 
 
 def load_config(filename):
@@ -76,34 +125,199 @@ def get_namespace_from_filepath(filename):
     return namespace
 
 
-def load_translation_file(filename, base_directory, locale=config.get("locale")):
+def parse_translation_file(filename, base_directory, locale=None):
+    if locale is None:
+        locale = config.get_locale()
     skip_locale_root_data = config.get("skip_locale_root_data")
     root_data = None if skip_locale_root_data else locale
-    translations_dic = load_resource(os.path.join(base_directory, filename), root_data)
+    return load_resource(os.path.join(base_directory, filename), root_data)
+
+
+def _stat(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None, None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def load_translation_file(filename, base_directory, locale=None):
+    """Load a translation file, once even if several threads ask for it.
+
+    Threads requesting a file that is already being loaded wait for that
+    load to finish instead of parsing the file again.
+    """
+    if locale is None:
+        locale = config.get_locale()
+    path = os.path.join(base_directory, filename)
+    _load_once((path, locale), _load_translation_file, filename, base_directory, locale)
+
+
+def _load_once(loading_key, load, *args):
+    with _loading_lock:
+        done = _loading.get(loading_key)
+        owner = done is None
+        if owner:
+            done = _loading[loading_key] = threading.Event()
+    if not owner:
+        done.wait()
+        return
+    try:
+        load(*args)
+    finally:
+        with _loading_lock:
+            del _loading[loading_key]
+        done.set()
+
+
+def _load_translation_file(filename, base_directory, locale):
+    file_stat = _stat(os.path.join(base_directory, filename))
+    translations_dic = parse_translation_file(filename, base_directory, locale)
+    merge_translation_file(
+        filename, base_directory, locale, translations_dic, file_stat
+    )
+
+
+def is_partially_loaded(filename, base_directory):
+    """Tell whether a file is large enough to be loaded one subtree at a time.
+
+    Only JSON files at least ``partial_loading_threshold`` bytes long are.
+    """
+    threshold = config.get("partial_loading_threshold")
+    if threshold is None or not filename.endswith(".json"):
+        return False
+    size = _stat(os.path.join(base_directory, filename))[1]
+    return size is not None and size >= threshold
+
+
+def search_group(key):
+    """Return what searches for ``key`` can be shared with: its namespace,
+    or the key itself when large files are loaded one subtree at a time,
+    since keys of the same namespace may then be in different subtrees."""
+    if config.get("partial_loading_threshold") is not None:
+        return key
+    return key.rpartition(config.get("namespace_delimiter"))[0]
+
+
+def load_translation_subtree(filename, base_directory, locale, splitted_key):
+    """Load, from a large file, only the subtree ``splitted_key`` is in.
+
+    The members of the file's top-level object are indexed once; the one
+    holding the key is then parsed on its own and each of them is loaded
+    at most once. A key ending at the file's namespace, like the prefix
+    searched by ``scope``, loads the whole file.
+    """
     namespace = get_namespace_from_filepath(filename)
-    load_translation_dic(translations_dic, namespace, locale)
+    depth = len(namespace.split(config.get("namespace_delimiter"))) if namespace else 0
+    if len(splitted_key) <= depth or not splitted_key[depth]:
+        load_translation_file(filename, base_directory, locale)
+        return
+    name = splitted_key[depth]
+    path = os.path.join(base_directory, filename)
+    if name in loaded_subtrees.get((path, locale), ()):
+        return
+    _load_once(
+        (path, locale, name),
+        _load_translation_subtrees,
+        filename,
+        base_directory,
+        locale,
+        [name],
+    )
 
 
-def load_translation_dic(dic, namespace, locale):
+def _load_translation_subtrees(filename, base_directory, locale, names, removed=()):
+    path = os.path.join(base_directory, filename)
+    loader = get_loader("json")
+    root_data = None if config.get("skip_locale_root_data") else locale
+    file_stat = _stat(path)
+    translations_dic = {}
+    for name in names:
+        subtree = loader.load_subtree(path, root_data, name)
+        if subtree is not None:
+            translations_dic[name] = subtree
+    flattened = _flatten_translation_file(filename, translations_dic)
+    translations.update(flattened, locale, removed)
+    previous = loaded_files.get((path, locale))
+    keys = flattened
+    if previous is not None and not removed:
+        keys = previous.keys + tuple(flattened)
+    _record_loaded_file(filename, base_directory, locale, file_stat, keys)
+    loaded_subtrees.setdefault((path, locale), set()).update(names)
+
+
+def _flatten_translation_file(filename, translations_dic):
+    namespace = get_namespace_from_filepath(filename)
+    return flatten_translation_dic(translations_dic, namespace)
+
+
+def merge_translation_file(filename, base_directory, locale, translations_dic, stat):
+    flattened = _flatten_translation_file(filename, translations_dic)
+    translations.update(flattened, locale)
+    _record_loaded_file(filename, base_directory, locale, stat, flattened)
+
+
+def _record_loaded_file(filename, base_directory, locale, stat, flattened):
+    path = os.path.join(base_directory, filename)
+    loaded_files[(path, locale)] = LoadedFile(
+        filename, base_directory, locale, stat[0], stat[1], tuple(flattened)
+    )
+
+
+def reload_translation_file(filename, base_directory, locale=None):
+    """Parse a file again and replace only the keys that came from it."""
+    if locale is None:
+        locale = config.get_locale()
+    path = os.path.join(base_directory, filename)
+    invalidate_resource(path)
+    previous = loaded_files.get((path, locale))
+    names = loaded_subtrees.pop((path, locale), None)
+    if names is not None and previous is not None:
+        # reload only the subtrees loaded from a partially loaded file
+        _load_translation_subtrees(
+            filename, base_directory, locale, sorted(names), previous.keys
+        )
+        return
+    file_stat = _stat(path)
+    translations_dic = parse_translation_file(filename, base_directory, locale)
+    flattened = _flatten_translation_file(filename, translations_dic)
+    removed = set(previous.keys).difference(flattened) if previous else ()
+    translations.update(flattened, locale, removed)
+    _record_loaded_file(filename, base_directory, locale, file_stat, flattened)
+
+
+def flatten_translation_dic(dic, namespace, flattened=None):
+    if flattened is None:
+        flattened = {}
     if namespace:
         namespace += config.get("namespace_delimiter")
     for key, value in dic.items():
-        if isinstance(value, dict) and len(set(PLURALS).intersection(value)) < 2:
-            load_translation_dic(value, namespace + key, locale)
+        if not isinstance(value, dict):
+            flattened[sys.intern(namespace + key)] = value
+        elif len(DETECTED_FORMS.intersection(value)) < 2:
+            flatten_translation_dic(value, namespace + key, flattened)
         else:
-            translations.add(namespace + key, value, locale)
+            flattened[sys.intern(namespace + key)] = Plural(value)
+    return flattened
 
 
-def load_directory(directory, locale=config.get("locale")):
-    for f in os.listdir(directory):
-        path = os.path.join(directory, f)
-        if os.path.isfile(path) and path.endswith(config.get("file_format")):
-            if "{locale}" in config.get("filename_format") and locale not in f:
-                continue
-            load_translation_file(f, directory, locale)
+def load_translation_dic(dic, namespace, locale):
+    for key, value in flatten_translation_dic(dic, namespace).items():
+        translations.add(key, value, locale)
 
 
-def search_translation(key, locale=config.get("locale")):
+def load_directory(directory, locale=None):
+    if locale is None:
+        locale = config.get_locale()
+    for f in file_index.find_in_directory(directory, locale):
+        load_translation_file(f, directory, locale)
+
+
+def search_translation(key, locale=None):
+    if locale is None:
+        locale = config.get_locale()
+    if not config.get("enable_lazy_loading"):
+        return
     splitted_key = key.split(config.get("namespace_delimiter"))
     if not splitted_key:
         return
@@ -113,24 +327,108 @@ def search_translation(key, locale=config.get("locale")):
             load_directory(directory, locale)
     else:
         for directory in config.get("load_path"):
-            recursive_search_dir(namespace, "", directory, locale)
+            recursive_search_dir(namespace, "", directory, locale, splitted_key)
 
 
 def recursive_search_dir(
-    splitted_namespace, directory, root_dir, locale=config.get("locale")
+    splitted_namespace, directory, root_dir, locale=None, splitted_key=None
 ):
+    if locale is None:
+        locale = config.get_locale()
     if not splitted_namespace:
         return
-    seeked_file = config.get("filename_format").format(
-        namespace=splitted_namespace[0], format=config.get("file_format"), locale=locale
+    path = file_index.find(root_dir, directory, splitted_namespace, locale)
+    if path is None:
+        return
+    if splitted_key is not None and is_partially_loaded(path, root_dir):
+        load_translation_subtree(path, root_dir, locale, splitted_key)
+    else:
+        load_translation_file(path, root_dir, locale)
+
+
+def iter_translation_files(locales=None):
+    """Yield ``(root_dir, path, locale)`` for the files of the load path.
+
+    Files whose name has no locale are yielded once for each of
+    ``locales``, or of the ``available_locales`` setting.
+    """
+    file_format = config.get("file_format")
+    shared_locales = sorted(
+        config.get("available_locales") if locales is None else locales
     )
-    dir_content = os.listdir(os.path.join(root_dir, directory))
-    if seeked_file in dir_content:
-        load_translation_file(os.path.join(directory, seeked_file), root_dir, locale)
-    elif splitted_namespace[0] in dir_content:
-        recursive_search_dir(
-            splitted_namespace[1:],
-            os.path.join(directory, splitted_namespace[0]),
-            root_dir,
-            locale,
+    for root_dir in config.get("load_path"):
+        root_files = file_index.get_files(root_dir)
+        for (_, locale, path_format), path in sorted(
+            root_files.items(), key=lambda item: item[1]
+        ):
+            if path_format != file_format:
+                continue
+            if locale is None:
+                for shared_locale in shared_locales:
+                    yield root_dir, path, shared_locale
+            elif locales is None or locale in locales:
+                yield root_dir, path, locale
+
+
+def _in_namespaces(namespace, namespaces):
+    if not namespace:
+        return True
+    delimiter = config.get("namespace_delimiter")
+    return any(
+        namespace == requested
+        or namespace.startswith(requested + delimiter)
+        or requested.startswith(namespace + delimiter)
+        for requested in namespaces
+    )
+
+
+def _timed_parse(entry):
+    root_dir, path, locale = entry
+    start = time.perf_counter()
+    file_stat = _stat(os.path.join(root_dir, path))
+    translations_dic = parse_translation_file(path, root_dir, locale)
+    return translations_dic, file_stat, time.perf_counter() - start
+
+
+def preload(locales=None, namespaces=None, strict=False, max_workers=None):
+    """Load every translation file of the load path up front.
+
+    The fallback chains of the requested locales are loaded along with them.
+    Files are parsed concurrently and merged in the order they were found,
+    then each locale's table is published at once.
+    Returns a dictionary mapping each loaded file to its parse time in
+    seconds, summed over the locales of files whose name has none. With
+    ``strict``, lazy loading is disabled afterwards so missing keys never
+    trigger a search on disk.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    if locales is not None:
+        locales = set(
+            chained
+            for locale in locales
+            for chained in translations.get_fallback_chain(locale)
         )
+    entries = [
+        entry
+        for entry in iter_translation_files(locales)
+        if namespaces is None
+        or _in_namespaces(get_namespace_from_filepath(entry[1]), namespaces)
+    ]
+    timings = {}
+    merged = {}
+    with ThreadPoolExecutor(max_workers) as executor:
+        results = executor.map(_timed_parse, entries)
+        for (root_dir, path, locale), (translations_dic, file_stat, elapsed) in zip(
+            entries, results
+        ):
+            flattened = _flatten_translation_file(path, translations_dic)
+            merged.setdefault(locale, {}).update(flattened)
+            _record_loaded_file(path, root_dir, locale, file_stat, flattened)
+            filename = os.path.join(root_dir, path)
+            timings[filename] = timings.get(filename, 0) + elapsed
+    for locale, flattened in merged.items():
+        translations.update(flattened, locale)
+    if strict:
+        config.set("enable_lazy_loading", False)
+    return timings
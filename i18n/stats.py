@@ -0,0 +1,101 @@
+import copy
+import random
+import time
+
+from . import config
+
+# locale -> counters of lookups, searches on disk, misses and fallbacks
+locales = {}
+# loader class name -> number of files, total and max seconds
+loaders = {}
+# path -> seconds taken by its last load
+files = {}
+latency = {"samples": 0, "seconds": 0.0, "max_seconds": 0.0}
+listeners = []
+
+_EVENTS = {"searches": "search", "misses": "miss", "fallbacks": "fallback"}
+
+
+def add_listener(listener):
+    """Register ``listener(event, data)``, called for every recorded event.
+
+    Events are ``search``, ``miss``, ``fallback``, ``load`` and ``latency``.
+    """
+    listeners.append(listener)
+
+
+def remove_listener(listener):
+    listeners.remove(listener)
+
+
+def _emit(event, data):
+    for listener in listeners:
+        listener(event, data)
+
+
+def count(counter, locale, key=None, **data):
+    counters = locales.get(locale)
+    if counters is None:
+        counters = locales.setdefault(
+            locale, dict.fromkeys(("lookups",) + tuple(_EVENTS), 0)
+        )
+    counters[counter] += 1
+    if listeners and counter in _EVENTS:
+        data.update(key=key, locale=locale)
+        _emit(_EVENTS[counter], data)
+
+
+def record_load(path, loader, seconds):
+    name = loader.__class__.__name__
+    timings = loaders.get(name)
+    if timings is None:
+        timings = loaders.setdefault(
+            name, {"count": 0, "seconds": 0.0, "max_seconds": 0.0}
+        )
+    timings["count"] += 1
+    timings["seconds"] += seconds
+    timings["max_seconds"] = max(timings["max_seconds"], seconds)
+    files[path] = seconds
+    if listeners:
+        _emit("load", {"path": path, "loader": name, "seconds": seconds})
+
+
+def observe(translate, key, locale, kwargs):
+    """Count a call to ``t`` and time a sample of them."""
+    count("lookups", locale)
+    if random.random() >= config.get("stats_sample_rate"):
+        return translate(key, locale, kwargs)
+    start = time.perf_counter()
+    try:
+        return translate(key, locale, kwargs)
+    finally:
+        seconds = time.perf_counter() - start
+        latency["samples"] += 1
+        latency["seconds"] += seconds
+        latency["max_seconds"] = max(latency["max_seconds"], seconds)
+        if listeners:
+            _emit("latency", {"key": key, "locale": locale, "seconds": seconds})
+
+
+def as_dict():
+    """Return a copy of the statistics, suitable for exporting."""
+    result_locales = copy.deepcopy(locales)
+    for counters in result_locales.values():
+        counters["hits"] = counters["lookups"] - counters["misses"]
+    result_latency = dict(latency)
+    result_latency["average_seconds"] = (
+        latency["seconds"] / latency["samples"] if latency["samples"] else 0.0
+    )
+    return {
+        "locales": result_locales,
+        "loaders": copy.deepcopy(loaders),
+        "files": dict(files),
+        "latency": result_latency,
+    }
+
+
+def reset():
+    locales.clear()
+    loaders.clear()
+    files.clear()
+    latency.update(samples=0, seconds=0.0, max_seconds=0.0)
@@ -0,0 +1,172 @@
+# -*- encoding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import datetime
+import gc
+import io
+import json
+import os
+import os.path
+import tempfile
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+
+# Python 3 only: always import reload from importlib
+from importlib import reload
+
+from i18n import catalog, cli, config, file_index, resource_loader, translations
+from i18n.config import json_available
+from i18n.plurals import Plural
+from i18n.translator import t
+
+RESOURCE_FOLDER = os.path.join(os.path.dirname(__file__), "resources")
+
+
+class TestCatalog(unittest.TestCase):
+    def setUp(self):
+        resource_loader.init_loaders()
+        translations.container = {}
+        reload(config)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+
+    def test_dumps_and_lookup(self):
+        data = {"foo.bar": "baz", "foo.plural": {"one": "1", "many": "%{count}"}}
+        data.update(("key_{0}".format(i), "value {0}".format(i)) for i in range(100))
+        compiled = catalog.Catalog(catalog.dumps(data, "en"))
+        self.assertEqual("en", compiled.locale)
+        self.assertEqual(data, dict(compiled))
+        self.assertIsInstance(compiled["foo.plural"], Plural)
+        compiled = catalog.Catalog(
+            catalog.dumps({"foo.plural": Plural(data["foo.plural"])}, "en")
+        )
+        self.assertEqual(data["foo.plural"], compiled["foo.plural"])
+        self.assertNotIn("foo.missing", compiled)
+        with self.assertRaises(KeyError):
+            compiled["foo.missing"]
+
+    def test_overlay(self):
+        compiled = catalog.Catalog(catalog.dumps({"foo": "bar"}, "en"))
+        compiled["foo"] = "overridden"
+        compiled["new"] = "value"
+        self.assertEqual({"foo": "overridden", "new": "value"}, dict(compiled))
+        del compiled["foo"]
+        self.assertNotIn("foo", compiled)
+
+    def test_load_catalog(self):
+        filename = os.path.join(self.tmp_dir.name, "en.i18nc")
+        catalog.dump({"foo.hi": "Hello %{name} !"}, "en", filename)
+        translations.add("foo.other", "other")
+        self.assertEqual("en", catalog.load_catalog(filename))
+        self.assertEqual("Hello Bob !", t("foo.hi", name="Bob"))
+        self.assertEqual("other", t("foo.other"))
+
+    def test_freeze(self):
+        translations.add("foo.hi", "Hello %{name} !")
+        translations.add("foo.date", datetime.date(2020, 1, 1))
+        translations.add("foo.hello", "Salut %{name} !", locale="fr")
+        self.addCleanup(gc.unfreeze)
+        catalog.freeze()
+        table = translations.container["en"]
+        self.assertIsInstance(table, catalog.Catalog)
+        self.assertIsInstance(table.buffer, bytes)
+        self.assertEqual({"foo.date": datetime.date(2020, 1, 1)}, table.overlay)
+        self.assertEqual("Hello Bob !", t("foo.hi", name="Bob"))
+        self.assertEqual("Salut Bob !", t("foo.hello", locale="fr", name="Bob"))
+        translations.add("foo.other", "other")
+        self.assertEqual("other", t("foo.other"))
+
+    @unittest.skipUnless(json_available, "json library not available")
+    def test_compile_command(self):
+        output = os.path.join(self.tmp_dir.name, "compiled")
+        with redirect_stdout(io.StringIO()):
+            status = cli.main(
+                [
+                    "-p",
+                    os.path.join(RESOURCE_FOLDER, "translations", "nested_dict_json"),
+                    "--file-format",
+                    "json",
+                    "--filename-format",
+                    "{locale}.{format}",
+                    "--skip-locale-root-data",
+                    "compile",
+                    "-o",
+                    output,
+                ]
+            )
+        self.assertEqual(0, status)
+        self.assertEqual(["en.i18nc", "pl.i18nc"], sorted(os.listdir(output)))
+        translations.container = {}
+        catalog.load_catalog(os.path.join(output, "pl.i18nc"))
+        self.assertEqual("Wykonaj", translations.get("COMMON.EXECUTE", locale="pl"))
+
+    @unittest.skipUnless(json_available, "json library not available")
+    def test_validate_command(self):
+        files = {
+            "en": {
+                "hi": "Hello %{name}",
+                "mails": {"one": "1 mail", "other": "%{count} mails"},
+                "only_en": "English",
+            },
+            "fr": {
+                "hi": "Bonjour %{nom}",
+                "mails": {"one": "1 courriel", "few": "%{count} courriels"},
+            },
+        }
+        for locale, data in files.items():
+            filename = os.path.join(self.tmp_dir.name, "{0}.json".format(locale))
+            with open(filename, "w") as f:
+                json.dump(data, f)
+        arguments = [
+            "-p",
+            self.tmp_dir.name,
+            "--file-format",
+            "json",
+            "--filename-format",
+            "{locale}.{format}",
+            "--skip-locale-root-data",
+            "-a",
+            "en",
+            "-a",
+            "fr",
+            "-j",
+            "2",
+            "validate",
+        ]
+        output, errors = io.StringIO(), io.StringIO()
+        with redirect_stdout(output), redirect_stderr(errors):
+            status = cli.main(arguments)
+        self.assertEqual(1, status)
+        self.assertIn("en.json [en]: 3 keys", output.getvalue())
+        self.assertEqual(
+            [
+                "error: mails [fr]: plural without 'other' or 'many' form",
+                "error: hi [fr]: placeholders ['nom'] differ from ['name'] in en",
+                "error: only_en [fr]: missing",
+            ],
+            errors.getvalue().splitlines(),
+        )
+
+        with redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()):
+            self.assertEqual(0, cli.main(arguments[:-1] + ["validate", "-l", "en"]))
+            self.assertEqual(
+                0,
+                cli.main(arguments[:-1] + ["validate", "-l", "en", "-l", "de"]),
+            )
+
+        with open(os.path.join(self.tmp_dir.name, "de.json"), "wb") as f:
+            f.write(b'{"hi": "Gr\xfc\xdf dich"}')
+        file_index.clear()
+        output, errors = io.StringIO(), io.StringIO()
+        with redirect_stdout(output), redirect_stderr(errors):
+            status = cli.main(arguments[:-1] + ["validate", "-l", "de"])
+        self.assertEqual(1, status)
+        self.assertIn("de.json: ", errors.getvalue())
+
+    def test_validate_without_files(self):
+        errors = io.StringIO()
+        with redirect_stdout(io.StringIO()), redirect_stderr(errors):
+            status = cli.main(["-p", self.tmp_dir.name, "validate"])
+        self.assertEqual(1, status)
+        self.assertIn("no translation files found", errors.getvalue())
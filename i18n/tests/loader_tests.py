@@ -2,16 +2,32 @@
 
 from __future__ import unicode_literals
 
+import asyncio
 import os
 import os.path
+import shutil
+import subprocess
+import sys
 import tempfile
+import threading
+import time
 import unittest
+from unittest import mock
 
 # Python 3 only: always import reload from importlib
 from importlib import reload
 
-from i18n import config, resource_loader, translations
+from i18n import (
+    aio,
+    config,
+    file_index,
+    reloader,
+    resource_loader,
+    translations,
+    translator,
+)
 from i18n.config import json_available, yaml_available
+from i18n.plurals import Plural
 from i18n.resource_loader import I18nFileLoadError
 from i18n.translator import t
 
@@ -27,6 +43,24 @@ class TestFileLoader(unittest.TestCase):
         config.set("filename_format", "{namespace}.{locale}.{format}")
         config.set("encoding", "utf-8")
 
+    def test_import_does_not_import_parsers(self):
+        code = "import sys, i18n; print(sorted({'yaml', 'json'} & set(sys.modules)))"
+        output = subprocess.check_output(
+            [sys.executable, "-c", code],
+            cwd=os.path.join(os.path.dirname(__file__), "..", ".."),
+        )
+        self.assertEqual(output.strip(), b"[]")
+
+    @unittest.skipUnless(json_available, "json library not available")
+    def test_lazy_loader(self):
+        resource_loader.init_json_loader()
+        self.assertNotIn("json", resource_loader.loaders)
+        loader = resource_loader.get_loader("json")
+        self.assertEqual(loader.__class__.__name__, "JsonLoader")
+        self.assertIs(resource_loader.get_loader("json"), loader)
+        resource_loader.init_json_loader()
+        self.assertIsNot(resource_loader.get_loader("json"), loader)
+
     def test_load_unavailable_extension(self):
         with self.assertRaisesRegex(I18nFileLoadError, "no loader .*"):
             resource_loader.load_resource("foo.bar", "baz")
@@ -77,6 +111,32 @@ class TestFileLoader(unittest.TestCase):
         self.assertIn("foo", data)
         self.assertEqual("bar", data["foo"])
 
+    @unittest.skipUnless(yaml_available, "yaml library not available")
+    def test_yaml_loader_setting(self):
+        import yaml
+
+        from i18n.loaders.yaml_loader import get_yaml_loader
+
+        self.assertIs(get_yaml_loader(), getattr(yaml, "CSafeLoader", yaml.SafeLoader))
+        config.set("yaml_loader", "python")
+        self.assertIs(get_yaml_loader(), yaml.SafeLoader)
+        config.set("yaml_loader", "c")
+        with mock.patch.object(yaml, "CSafeLoader", None):
+            with self.assertRaisesRegex(I18nFileLoadError, ".*without libyaml"):
+                get_yaml_loader()
+        config.set("yaml_loader", "fast")
+        with self.assertRaisesRegex(I18nFileLoadError, "unknown yaml_loader .*"):
+            get_yaml_loader()
+
+    @unittest.skipUnless(yaml_available, "yaml library not available")
+    def test_yaml_loader_is_safe(self):
+        resource_loader.init_yaml_loader()
+        loader = resource_loader.get_loader("yml")
+        for choice in ("auto", "python"):
+            config.set("yaml_loader", choice)
+            with self.assertRaisesRegex(I18nFileLoadError, "invalid YAML: .*"):
+                loader.parse_file("foo: !!python/name:os.system")
+
     @unittest.skipUnless(json_available, "json library not available")
     def test_load_json_file(self):
         resource_loader.init_json_loader()
@@ -94,6 +154,39 @@ class TestFileLoader(unittest.TestCase):
         self.assertIn("foo", data)
         self.assertEqual("bar", data["foo"])
 
+    def test_load_python_files_by_path(self):
+        resource_loader.init_python_loader()
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir, True)
+        paths = []
+        for directory in ("first", "second"):
+            os.mkdir(os.path.join(tmp_dir, directory))
+            paths.append(os.path.join(tmp_dir, directory, "foo.en.py"))
+            with open(paths[-1], "w") as f:
+                f.write("en = {{'key': {0!r}}}\n".format(directory))
+        sys_path = list(sys.path)
+        self.assertEqual(
+            resource_loader.load_resource(paths[0], "en"), {"key": "first"}
+        )
+        self.assertEqual(
+            resource_loader.load_resource(paths[1], "en"), {"key": "second"}
+        )
+        self.assertEqual(sys.path, sys_path)
+        self.assertFalse(any(name.startswith("i18n._catalogs") for name in sys.modules))
+
+        with open(paths[0], "w") as f:
+            f.write("en = {'key': 'changed'}\n")
+        resource_loader.invalidate_resource(paths[0])
+        self.assertEqual(
+            resource_loader.load_resource(paths[0], "en"), {"key": "changed"}
+        )
+
+        with open(paths[1], "w") as f:
+            f.write("en = {\n")
+        resource_loader.invalidate_resource(paths[1])
+        with self.assertRaisesRegex(I18nFileLoadError, "error loading file .*"):
+            resource_loader.load_resource(paths[1], "en")
+
     @unittest.skipUnless(yaml_available, "yaml library not available")
     def test_memoization_with_file(self):
         """This test creates a temporary file with the help of the
@@ -127,6 +220,77 @@ class TestFileLoader(unittest.TestCase):
         # test the translation again to make sure it's loaded from memory
         self.assertEqual(t("memoize.key"), "value")
 
+    @unittest.skipUnless(json_available, "json library not available")
+    def test_memoization_caches_parsed_data(self):
+        resource_loader.init_json_loader()
+        config.set("enable_memoization", True)
+        loader = resource_loader.get_loader("json")
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir, True)
+        path = os.path.join(tmp_dir, "cached.en.json")
+        with open(path, "w") as f:
+            f.write('{"en": {"key": "value"}}')
+        with mock.patch.object(
+            loader, "parse_file", side_effect=loader.parse_file
+        ) as parse:
+            data = [resource_loader.load_resource(path, "en") for _ in range(3)]
+            self.assertEqual(data, [{"key": "value"}] * 3)
+            self.assertEqual(parse.call_count, 1)
+            resource_loader.load_resource(path, None)
+            self.assertEqual(parse.call_count, 2)
+
+            with open(path, "w") as f:
+                f.write('{"en": {"key": "changed"}}')
+            os.utime(path, ns=(0, 0))
+            self.assertEqual(
+                resource_loader.load_resource(path, "en"), {"key": "changed"}
+            )
+            self.assertEqual(parse.call_count, 3)
+
+            resource_loader.invalidate_resource(path)
+            self.assertEqual(len(loader.cache), 0)
+            resource_loader.load_resource(path, "en")
+            self.assertEqual(parse.call_count, 4)
+
+            os.remove(path)
+            self.assertEqual(
+                resource_loader.load_resource(path, "en"), {"key": "changed"}
+            )
+            loader.clear()
+            with self.assertRaisesRegex(I18nFileLoadError, "error loading file .*"):
+                resource_loader.load_resource(path, "en")
+
+    @unittest.skipUnless(json_available, "json library not available")
+    def test_disk_cache(self):
+        from i18n import disk_cache
+        from i18n.loaders.json_loader import JsonLoader
+
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir, True)
+        config.set("cache_dir", os.path.join(tmp_dir, "cache"))
+        path = os.path.join(tmp_dir, "cached.en.json")
+        with open(path, "w") as f:
+            f.write('{"en": {"key": "value"}}')
+        self.assertEqual(JsonLoader().load_resource(path, "en"), {"key": "value"})
+        self.assertEqual(len(os.listdir(config.get("cache_dir"))), 1)
+
+        # a new loader, as in another process, reads the cached data
+        loader = JsonLoader()
+        with mock.patch.object(loader, "parse_file") as parse:
+            self.assertEqual(loader.load_resource(path, "en"), {"key": "value"})
+        parse.assert_not_called()
+
+        with open(path, "w") as f:
+            f.write('{"en": {"key": "changed"}}')
+        self.assertEqual(JsonLoader().load_resource(path, "en"), {"key": "changed"})
+        self.assertEqual(len(os.listdir(config.get("cache_dir"))), 2)
+
+        disk_cache.clear()
+        self.assertEqual(os.listdir(config.get("cache_dir")), [])
+        with mock.patch.object(JsonLoader, "get_data", return_value={"key": object()}):
+            JsonLoader().load_resource(path, "en")
+        self.assertEqual(os.listdir(config.get("cache_dir")), [])
+
     @unittest.skipUnless(json_available, "json library not available")
     def test_load_file_with_strange_encoding(self):
         resource_loader.init_json_loader()
@@ -176,11 +340,20 @@ class TestFileLoader(unittest.TestCase):
         )
         self.assertTrue(translations.has("foo.mail_number"))
         translated_plural = translations.get("foo.mail_number")
-        self.assertIsInstance(translated_plural, dict)
+        self.assertIsInstance(translated_plural, Plural)
         self.assertEqual(translated_plural["zero"], "You do not have any mail.")
         self.assertEqual(translated_plural["one"], "You have a new mail.")
         self.assertEqual(translated_plural["many"], "You have %{count} new mails.")
 
+    def test_ordinal_names_are_not_plural(self):
+        resource_loader.load_translation_dic(
+            {"step": {"one": "First step", "two": "Second step", "three": "Third"}},
+            "steps",
+            "en",
+        )
+        self.assertEqual(t("steps.step.one"), "First step")
+        self.assertEqual(t("steps.step.two"), "Second step")
+
     @unittest.skipUnless(yaml_available, "yaml library not available")
     def test_search_translation_yaml(self):
         resource_loader.init_yaml_loader()
@@ -216,7 +389,7 @@ class TestFileLoader(unittest.TestCase):
         )
         config.set("filename_format", "{locale}.{format}")
         config.set("skip_locale_root_data", True)
-        config.set("locale", ["en", "pl"])
+        config.set("available_locales", ["en", "pl"])
         resource_loader.search_translation("COMMON.VERSION")
         self.assertTrue(translations.has("COMMON.VERSION"))
         self.assertEqual(translations.get("COMMON.VERSION"), "version")
@@ -233,7 +406,7 @@ class TestFileLoader(unittest.TestCase):
         )
         config.set("filename_format", "{locale}.{format}")
         config.set("skip_locale_root_data", True)
-        config.set("locale", ["en", "pl"])
+        config.set("available_locales", ["en", "pl"])
         resource_loader.search_translation("COMMON.VERSION", locale="pl")
         self.assertTrue(translations.has("COMMON.VERSION", locale="pl"))
         self.assertEqual(translations.get("COMMON.VERSION", locale="pl"), "wersja")
@@ -268,6 +441,268 @@ class TestFileLoader(unittest.TestCase):
         self.assertTrue(translations.has("TOP_MENU.TOP_BAR.LOGS", locale="pl"))
         self.assertEqual(translations.get("TOP_MENU.TOP_BAR.LOGS", locale="pl"), "Logi")
 
+    @unittest.skipUnless(yaml_available, "yaml library not available")
+    def test_preload(self):
+        resource_loader.init_yaml_loader()
+        config.set("file_format", "yml")
+        timings = resource_loader.preload(locales=["en"], namespaces=["foo"])
+        self.assertEqual(
+            [os.path.join(RESOURCE_FOLDER, "translations", "foo.en.yml")],
+            list(timings),
+        )
+        self.assertTrue(translations.has("foo.normal_key"))
+        self.assertFalse(translations.has("foo.normal_key", locale="ja"))
+
+    @unittest.skipUnless(yaml_available, "yaml library not available")
+    def test_preload_strict(self):
+        resource_loader.init_yaml_loader()
+        config.set("file_format", "yml")
+        resource_loader.preload(locales=["en"], strict=True)
+        self.assertTrue(translations.has("foo.parent.nested_key"))
+        resource_loader.search_translation("foo.normal_key", locale="ja")
+        self.assertFalse(translations.has("foo.normal_key", locale="ja"))
+
+    @unittest.skipUnless(json_available, "json library not available")
+    def test_preload_files_without_locale(self):
+        resource_loader.init_json_loader()
+        config.set("file_format", "json")
+        config.set("filename_format", "{namespace}.{format}")
+        config.set("available_locales", ["en", "fr"])
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        config.set("load_path", [tmp_dir.name])
+        filename = os.path.join(tmp_dir.name, "shared.json")
+        with open(filename, "w", encoding="utf-8") as f:
+            f.write('{"en": {"key": "value"}, "fr": {"key": "valeur"}}')
+        self.assertEqual([filename], list(resource_loader.preload(strict=True)))
+        self.assertEqual(t("shared.key"), "value")
+        self.assertEqual(t("shared.key", locale="fr"), "valeur")
+
+    def test_refresh_does_not_modify_published_index(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        config.set("load_path", [tmp_dir.name])
+        root_files = file_index.get_files(tmp_dir.name)
+        self.assertEqual(root_files, {})
+        with open(os.path.join(tmp_dir.name, "late.en.yml"), "w") as f:
+            f.write("en:\n  key: value\n")
+        os.utime(tmp_dir.name, ns=(0, 0))
+        file_index.refresh(tmp_dir.name)
+        self.assertEqual(root_files, {})
+        self.assertEqual(
+            list(file_index.get_files(tmp_dir.name).values()), ["late.en.yml"]
+        )
+
+    @unittest.skipUnless(json_available, "json library not available")
+    def test_search_translation_refreshes_index(self):
+        resource_loader.init_json_loader()
+        config.set("file_format", "json")
+        config.set("index_refresh_interval", 0)
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        config.set("load_path", [tmp_dir.name])
+        resource_loader.search_translation("late.key")
+        self.assertFalse(translations.has("late.key"))
+        os.makedirs(os.path.join(tmp_dir.name, "nested"))
+        with open(os.path.join(tmp_dir.name, "nested", "late.en.json"), "w") as f:
+            f.write('{"en": {"key": "value"}}')
+        resource_loader.search_translation("nested.late.key")
+        self.assertEqual(translations.get("nested.late.key"), "value")
+
+    @unittest.skipUnless(json_available, "json library not available")
+    def test_reload_changed_file(self):
+        resource_loader.init_json_loader()
+        config.set("file_format", "json")
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        filename = os.path.join(tmp_dir.name, "live.en.json")
+        with open(filename, "w") as f:
+            f.write('{"en": {"kept": "old", "dropped": "old"}}')
+        resource_loader.load_translation_file("live.en.json", tmp_dir.name)
+        translations.add("other", "untouched")
+        self.assertEqual([], reloader.check())
+        with open(filename, "w") as f:
+            f.write('{"en": {"kept": "new value", "added": "new"}}')
+        os.utime(filename, ns=(0, 0))
+        self.assertEqual([filename], reloader.check())
+        self.assertEqual(translations.get("live.kept"), "new value")
+        self.assertEqual(translations.get("live.added"), "new")
+        self.assertFalse(translations.has("live.dropped"))
+        self.assertEqual(translations.get("other"), "untouched")
+
+    @unittest.skipUnless(json_available, "json library not available")
+    def test_partial_loading_grouped_lookups(self):
+        resource_loader.init_json_loader()
+        config.set("file_format", "json")
+        config.set("filename_format", "{namespace}.{locale}.{format}")
+        config.set("partial_loading_threshold", 0)
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        config.set("load_path", [tmp_dir.name])
+        for namespace in ("many", "gathered", "scoped"):
+            filename = os.path.join(tmp_dir.name, namespace + ".en.json")
+            with open(filename, "w", encoding="utf-8") as f:
+                f.write('{"en": {"a": "A", "b": "B", "c": "C"}}')
+        self.assertEqual(
+            translator.t_many(["many.a", "many.b", "many.d"]), ["A", "B", "many.d"]
+        )
+        self.assertFalse(translations.has("many.c"))
+
+        async def main():
+            return await asyncio.gather(aio.at("gathered.a"), aio.at("gathered.b"))
+
+        self.assertEqual(asyncio.run(main()), ["A", "B"])
+        self.assertEqual(translator.scope("scoped").t("c"), "C")
+        self.assertTrue(translations.has("scoped.a"))
+
+    @unittest.skipUnless(json_available, "json library not available")
+    def test_partial_loading(self):
+        resource_loader.init_json_loader()
+        config.set("file_format", "json")
+        config.set("filename_format", "{locale}.{format}")
+        config.set("partial_loading_threshold", 0)
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        config.set("load_path", [tmp_dir.name])
+        filename = os.path.join(tmp_dir.name, "en.json")
+        with open(filename, "w", encoding="utf-8") as f:
+            f.write(
+                '{"en": {"emails": {"hi": "h\u00e9llo", "count": {"one": "1",'
+                ' "many": "%{count}"}}, "errors": {"missing": "missing"},'
+                ' "title": "Title"}}'
+            )
+        self.assertEqual(t("emails.hi"), "héllo")
+        self.assertEqual(t("emails.count", count=2), "2")
+        self.assertFalse(translations.has("errors.missing"))
+        self.assertEqual(t("nothing.here"), "nothing.here")
+        self.assertEqual(t("errors.missing"), "missing")
+        self.assertFalse(translations.has("title"))
+        self.assertEqual(
+            sorted(resource_loader.loaded_files[(filename, "en")].keys),
+            ["emails.count", "emails.hi", "errors.missing"],
+        )
+
+        with open(filename, "w", encoding="utf-8") as f:
+            f.write('{"en": {"emails": {"hi": "hi"}, "title": "New title"}}')
+        os.utime(filename, ns=(0, 0))
+        self.assertEqual([filename], reloader.check())
+        self.assertEqual(t("emails.hi"), "hi")
+        self.assertFalse(translations.has("emails.count"))
+        self.assertFalse(translations.has("errors.missing"))
+        self.assertFalse(translations.has("title"))
+
+    def test_concurrent_loads_parse_once(self):
+        calls = []
+        started = threading.Event()
+
+        def slow_parse(filename, base_directory, locale):
+            calls.append(filename)
+            started.set()
+            time.sleep(0.05)
+            return {"key": "value"}
+
+        with mock.patch.object(resource_loader, "parse_translation_file", slow_parse):
+            threads = [
+                threading.Thread(
+                    target=resource_loader.load_translation_file,
+                    args=("shared.en.yml", RESOURCE_FOLDER, "en"),
+                )
+                for _ in range(8)
+            ]
+            threads[0].start()
+            started.wait()
+            for thread in threads[1:]:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(["shared.en.yml"], calls)
+        self.assertEqual(translations.get("shared.key"), "value")
+
+    @unittest.skipUnless(yaml_available, "yaml library not available")
+    def test_aload_coalesces_concurrent_loads(self):
+        resource_loader.init_yaml_loader()
+        config.set("file_format", "yml")
+        parse = resource_loader.parse_translation_file
+        with mock.patch.object(
+            resource_loader, "parse_translation_file", side_effect=parse
+        ) as parse_mock:
+
+            async def main():
+                return await asyncio.gather(
+                    *[aio.at("foo.normal_key", locale="ja") for _ in range(20)]
+                )
+
+            self.assertEqual(asyncio.run(main()), ["普通"] * 20)
+        self.assertEqual(parse_mock.call_count, 1)
+        self.assertEqual(aio._pending, {})
+
+    @unittest.skipUnless(yaml_available, "yaml library not available")
+    def test_at_fallback(self):
+        resource_loader.init_yaml_loader()
+        config.set("file_format", "yml")
+        config.set("fallback", "ja")
+
+        async def main():
+            with config.use_locale("en"):
+                return (
+                    await aio.at("foo.fallback_key"),
+                    await aio.at("foo.inexistent", default="none"),
+                )
+
+        self.assertEqual(asyncio.run(main()), ("フォールバック", "none"))
+        self.assertTrue(translations.has("foo.normal_key", locale="en"))
+
+        async def repeat():
+            return [await aio.at("foo.fallback_key", locale="en") for _ in range(5)]
+
+        asyncio.run(aio.at("foo.fallback_key", locale="en"))
+        with mock.patch.object(resource_loader, "search_translation") as search:
+            self.assertEqual(asyncio.run(repeat()), ["フォールバック"] * 5)
+        self.assertFalse(search.called)
+
+    def test_concurrent_updates_keep_all_keys(self):
+        barrier = threading.Barrier(8)
+
+        def load(number):
+            barrier.wait()
+            for index in range(50):
+                translations.update({"file{0}.key{1}".format(number, index): "v"}, "en")
+            translations.add("added{0}".format(number), "v", "en")
+
+        threads = [threading.Thread(target=load, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(translations.container["en"]), 8 * 51)
+
+    @unittest.skipUnless(yaml_available, "yaml library not available")
+    def test_compact_storage(self):
+        resource_loader.init_yaml_loader()
+        config.set("file_format", "yml")
+        config.set("compact_storage", True)
+        resource_loader.preload()
+        table = translations.container["ja"]
+        self.assertIsInstance(table, translations.CompactTable)
+        self.assertTrue(translations.has("foo.normal_key", locale="ja"))
+        self.assertFalse(translations.has("foo.mail_number", locale="ja"))
+        self.assertEqual(
+            translations.get("foo.mail_number", locale="en")["one"],
+            "You have a new mail.",
+        )
+        self.assertEqual(len(table), len(dict(table)))
+        self.assertEqual(list(table.values()), [table[key] for key in table])
+        self.assertEqual(dict(table.items()), dict(table))
+        self.assertIn(("foo.normal_key", "普通"), table.items())
+        del table["foo.normal_key"]
+        self.assertFalse(translations.has("foo.normal_key", locale="ja"))
+
+    def test_compact(self):
+        translations.add("foo", "bar")
+        translations.compact()
+        self.assertIsInstance(translations.container["en"], translations.CompactTable)
+        self.assertEqual(translations.get("foo"), "bar")
+
 
 suite = unittest.TestLoader().loadTestsFromTestCase(TestFileLoader)
 unittest.TextTestRunner(verbosity=2).run(suite)
@@ -1,5 +1,6 @@
 import unittest
 
+from i18n.tests.catalog_tests import TestCatalog
 from i18n.tests.loader_tests import TestFileLoader
 from i18n.tests.translation_tests import TestTranslationFormat
 
@@ -9,6 +10,7 @@ def suite():
     loader = unittest.TestLoader()
     suite.addTest(loader.loadTestsFromTestCase(TestFileLoader))
     suite.addTest(loader.loadTestsFromTestCase(TestTranslationFormat))
+    suite.addTest(loader.loadTestsFromTestCase(TestCatalog))
     return suite
 
 
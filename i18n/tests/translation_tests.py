@@ -2,14 +2,26 @@
 
 from __future__ import unicode_literals
 
+import asyncio
+import contextvars
 import os
 import os.path
+import threading
 import unittest
+from decimal import Decimal
+from unittest import mock
 
 # Python 3 only: always import reload from importlib
 from importlib import reload
 
-from i18n import config, resource_loader, translations
+from i18n import (
+    config,
+    plurals,
+    resource_loader,
+    stats,
+    translations,
+    translator,
+)
 from i18n.translator import t
 
 RESOURCE_FOLDER = os.path.dirname(__file__) + os.sep + "resources" + os.sep
@@ -62,6 +74,113 @@ class TestTranslationFormat(unittest.TestCase):
         config.set("fallback", "fr")
         self.assertEqual(t("foo.hello", name="Bob"), "Salut Bob !")
 
+    def test_fallback_chain(self):
+        config.set("fallback_chains", {"pt-BR": ["pt"]})
+        self.addCleanup(config.set, "fallback_chains", {})
+        translations.add("foo.chained", "from pt", locale="pt")
+        self.assertEqual(
+            ("pt-BR", "pt", "en"), translations.get_fallback_chain("pt-BR")
+        )
+        self.assertEqual("from pt", t("foo.chained", locale="pt-BR"))
+        self.assertEqual("normal_value", t("foo.normal_key", locale="pt-BR"))
+        self.assertEqual(
+            ("pt", translations.generation),
+            translations.resolutions[("pt-BR", "foo.chained")],
+        )
+        self.assertEqual(
+            ["from pt", "normal_value"],
+            translator.t_many(["foo.chained", "foo.normal_key"], locale="pt-BR"),
+        )
+
+    def test_fallback_list(self):
+        config.set("fallback", ["fr", "en"])
+        self.assertEqual("Salut Bob !", t("foo.hello", locale="ja", name="Bob"))
+        self.assertEqual("Hello Bob !", t("foo.hi", locale="ja", name="Bob"))
+
+    def test_use_locale(self):
+        with config.use_locale("fr"):
+            self.assertEqual(config.get_locale(), "fr")
+            self.assertEqual(t("foo.hello", name="Bob"), "Salut Bob !")
+            self.assertEqual(t("foo.hi", locale="en", name="Bob"), "Hello Bob !")
+        self.assertEqual(config.get_locale(), "en")
+
+        @config.use_locale("fr")
+        def greet():
+            return t("foo.hello", name="Bob")
+
+        self.assertEqual(greet(), "Salut Bob !")
+        self.assertEqual(config.get_locale(), "en")
+
+    def test_use_locale_threads(self):
+        results = {}
+
+        def greet(locale):
+            with config.use_locale(locale):
+                barrier.wait()
+                results[locale] = t("foo.hello", name="Bob")
+
+        barrier = threading.Barrier(2)
+        threads = [
+            threading.Thread(target=greet, args=(locale,)) for locale in ("fr", "ja")
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, {"fr": "Salut Bob !", "ja": "foo.hello"})
+
+    def test_use_locale_shared_between_threads(self):
+        french = config.use_locale("fr")
+        entered = threading.Barrier(2)
+        first_left = threading.Event()
+        results = []
+
+        def greet(first):
+            with french:
+                entered.wait()
+                if not first:
+                    first_left.wait(5)
+                results.append(t("foo.hello", name="Bob"))
+            if first:
+                first_left.set()
+            results.append(config.get_locale())
+
+        threads = [threading.Thread(target=greet, args=(n == 0,)) for n in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ["Salut Bob !", "en", "Salut Bob !", "en"])
+
+    def test_use_locale_leaves_context_size_alone(self):
+        @config.use_locale("fr")
+        def greet():
+            return t("foo.hello", name="Bob")
+
+        greet()
+        size = len(contextvars.copy_context())
+        for _ in range(100):
+            greet()
+            with config.use_locale("fr"):
+                pass
+        self.assertEqual(len(contextvars.copy_context()), size)
+
+    def test_use_locale_tasks(self):
+        @config.use_locale("fr")
+        async def french():
+            await asyncio.sleep(0)
+            return t("foo.hello", name="Bob")
+
+        async def default():
+            await asyncio.sleep(0)
+            return t("foo.hello", name="Bob")
+
+        async def main():
+            return await asyncio.gather(french(), default())
+
+        config.set("fallback", "ja")
+        self.assertEqual(asyncio.run(main()), ["Salut Bob !", "foo.hello"])
+
     def test_fallback_from_resource(self):
         config.set("fallback", "ja")
         self.assertEqual(t("foo.fallback_key"), "フォールバック")
@@ -77,6 +196,36 @@ class TestTranslationFormat(unittest.TestCase):
         with self.assertRaises(KeyError):
             t("foo.hi")
 
+    def test_escaped_placeholder(self):
+        translations.add("foo.escaped", "100%% of %{name}")
+        self.assertEqual(t("foo.escaped", name="Bob"), "100% of Bob")
+
+    def test_formatter_cache(self):
+        translator.formatters.clear()
+        t("foo.hi", name="Bob")
+        t("foo.hi", name="Alice")
+        self.assertEqual(list(translator.formatters.data), ["Hello %{name} !"])
+        t("foo.normal_key")
+        self.assertNotIn("normal_value", translator.formatters)
+        config.set("formatter_cache_size", 1)
+        self.addCleanup(config.set, "formatter_cache_size", 4096)
+        t("foo.hello", locale="fr", name="Bob")
+        self.assertEqual(list(translator.formatters.data), ["Salut %{name} !"])
+
+    def test_render_cache(self):
+        config.set("enable_render_cache", True)
+        self.addCleanup(config.set, "enable_render_cache", False)
+        translator.render_cache.clear()
+        translations.add("foo.cached", "Hi %{name}")
+        self.assertEqual("Hi Bob", t("foo.cached", name="Bob"))
+        self.assertEqual("Hi Bob", t("foo.cached", name="Bob"))
+        self.assertEqual("Hi 1", t("foo.cached", name=1))
+        self.assertEqual("Hi True", t("foo.cached", name=True))
+        self.assertEqual("Hi ['x']", t("foo.cached", name=["x"]))
+        self.assertEqual(1, translator.render_cache.stats()["hits"])
+        translations.add("foo.cached", "Bye %{name}")
+        self.assertEqual("Bye Bob", t("foo.cached", name="Bob"))
+
     def test_basic_pluralization(self):
         self.assertEqual(t("foo.basic_plural", count=0), "0 elems")
         self.assertEqual(t("foo.basic_plural", count=1), "1 elem")
@@ -95,9 +244,144 @@ class TestTranslationFormat(unittest.TestCase):
         with self.assertRaises(KeyError):
             t("foo.bad_plural", count=0)
 
+    def test_plural_rules(self):
+        plurals.register("ru")
+        self.addCleanup(plurals.register, "ru", plurals.legacy_rule)
+        translations.add(
+            "foo.files",
+            {
+                "one": "%{count} файл",
+                "few": "%{count} файла",
+                "many": "%{count} файлов",
+            },
+            locale="ru",
+        )
+        self.assertEqual(
+            [t("foo.files", locale="ru", count=n) for n in (1, 3, 5, 11, 21, 22)],
+            [
+                "1 файл",
+                "3 файла",
+                "5 файлов",
+                "11 файлов",
+                "21 файл",
+                "22 файла",
+            ],
+        )
+        self.assertIs(plurals.get_rule("ru_RU"), plurals.rules["ru"])
+        self.assertEqual(t("foo.plural", count=12), "12 mails")
+        config.set("fallback", "ru")
+        self.assertEqual(translator.t_many(["foo.files"], count=5), ["5 файлов"])
+
+    def test_compile_plural_rule(self):
+        rule = plurals.compile_rule(plurals.CLDR_RULES["ar"])
+        self.assertEqual(
+            [rule(n) for n in (0, 1, 2, 3, 11, 100, 1.5)],
+            ["zero", "one", "two", "few", "many", "other", "other"],
+        )
+        rule = plurals.compile_rule({"one": "i = 1 and v = 0 @integer 1"})
+        self.assertEqual(
+            [rule(1), rule(Decimal("1.0")), rule(2)], ["one", "other", "other"]
+        )
+        self.assertEqual([rule(1e-05), rule(1e16)], ["other", "other"])
+        with self.assertRaises(ValueError):
+            plurals.compile_rule({"one": "n = 1 and"})
+        with self.assertRaises(ValueError):
+            plurals.compile_rule({"single": "n = 1"})
+
+    def test_t_many(self):
+        self.assertEqual(
+            [
+                "normal_value",
+                "Hello Bob !",
+                "Hello Alice !",
+                "3 elems",
+                "foo.inexistent",
+            ],
+            translator.t_many(
+                [
+                    "foo.normal_key",
+                    "foo.hi",
+                    ("foo.hi", {"name": "Alice"}),
+                    ("foo.basic_plural", {"count": 3}),
+                    "foo.inexistent",
+                ],
+                name="Bob",
+            ),
+        )
+
+    def test_t_many_fallback(self):
+        config.set("fallback", "fr")
+        self.assertEqual(
+            ["Salut Bob !", "fallback"],
+            translator.t_many(
+                ["foo.hello", ("foo.inexistent", {"default": "fallback"})],
+                name="Bob",
+            ),
+        )
+
+    def test_scope(self):
+        foo = translator.scope("foo")
+        self.assertIs(foo, translator.scope("foo"))
+        self.assertEqual("normal_value", foo.t("normal_key"))
+        self.assertEqual("Hello Bob !", foo.t("hi", name="Bob"))
+        self.assertEqual("3 elems", foo.t("basic_plural", count=3))
+        self.assertEqual("foo.inexistent", foo.t("inexistent"))
+        translations.add("foo.scoped", "added later")
+        self.assertEqual("added later", translator.scope("foo").t("scoped"))
+
+    def test_scope_locale(self):
+        self.assertEqual(
+            "Salut Bob !", translator.scope("foo", "fr").t("hello", name="Bob")
+        )
+
+    def test_stats(self):
+        stats.reset()
+        events = []
+        stats.add_listener(lambda event, data: events.append((event, data.get("key"))))
+        self.addCleanup(stats.listeners.clear)
+        config.set("enable_stats", True)
+        config.set("stats_sample_rate", 1)
+        self.addCleanup(config.set, "enable_stats", False)
+        config.set("fallback", "fr")
+        t("foo.hi", name="Bob")
+        t("foo.hello", name="Bob")
+        recorded = stats.as_dict()
+        self.assertEqual(
+            {"lookups": 2, "searches": 1, "misses": 1, "fallbacks": 1, "hits": 1},
+            recorded["locales"]["en"],
+        )
+        self.assertEqual(1, recorded["locales"]["fr"]["hits"])
+        self.assertEqual(2, recorded["latency"]["samples"])
+        self.assertIn(("fallback", "foo.hello"), events)
+        t("foo.hello", name="Bob")
+        recorded = stats.as_dict()
+        self.assertEqual(2, recorded["locales"]["fr"]["lookups"])
+        self.assertEqual(2, recorded["locales"]["fr"]["hits"])
+
     def test_default(self):
         self.assertEqual(t("inexistent_key", default="foo"), "foo")
 
+    def test_missing_cache(self):
+        config.set("enable_missing_cache", True)
+        self.addCleanup(translations.clear_missing)
+        self.addCleanup(config.set, "enable_missing_cache", False)
+        self.addCleanup(translations.update, {}, "en", ["foo.cached_missing"])
+        self.assertEqual(t("foo.cached_missing"), "foo.cached_missing")
+        with mock.patch.object(resource_loader, "search_translation") as search:
+            self.assertEqual(t("foo.cached_missing"), "foo.cached_missing")
+            self.assertFalse(search.called)
+        translations.add("foo.cached_missing", "now here")
+        self.assertEqual(t("foo.cached_missing"), "now here")
+
+    def test_missing_cache_ttl(self):
+        config.set("enable_missing_cache", True)
+        config.set("missing_cache_ttl", 0)
+        self.addCleanup(translations.clear_missing)
+        self.addCleanup(config.set, "missing_cache_ttl", None)
+        self.addCleanup(config.set, "enable_missing_cache", False)
+        t("foo.expired_missing")
+        self.assertFalse(translations.is_missing("foo.expired_missing"))
+
     def test_skip_locale_root_data(self):
         config.set("filename_format", "{locale}.{format}")
         config.set("file_format", "json")
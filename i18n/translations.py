@@ -1,15 +1,198 @@
+import sys
+import threading
+from collections.abc import MutableMapping
+
 from . import config
+from .cache import LRUCache
 
+# locale -> table of translations. Loaders never modify a published table:
+# they build an updated copy and replace it, so readers need no locking.
 container = {}
+# serializes writers, so that two copies of a table are never updated at once
+write_lock = threading.RLock()
+# incremented whenever a translation is added, to invalidate derived data
+generation = 0
+missing = LRUCache("missing_cache_size", "missing_cache_ttl")
+
+# (locale, key) -> (locale it was found in, generation) for keys resolved
+# through a fallback locale
+resolutions = {}
+_fallback_chains = {}
+
+# key -> id, shared by every CompactTable
+key_ids = {}
+key_names = []
+_key_ids_lock = threading.Lock()
+_ABSENT = object()
+
+
+def _key_id(key):
+    key_id = key_ids.get(key)
+    if key_id is None:
+        with _key_ids_lock:
+            key_id = key_ids.get(key)
+            if key_id is None:
+                key_id = key_ids[sys.intern(key)] = len(key_names)
+                key_names.append(key)
+    return key_id
+
+
+class CompactTable(MutableMapping):
+    """Table of translations storing values in a list indexed by key id.
+
+    Keys are stored once in ``key_ids`` for all locales, so each locale only
+    costs one list slot per key instead of a dictionary entry.
+    """
+
+    __slots__ = ("_values", "size")
+
+    def __init__(self, values=None, size=0):
+        super(CompactTable, self).__init__()
+        self._values = [] if values is None else values
+        self.size = size
+
+    def __contains__(self, key):
+        key_id = key_ids.get(key)
+        return (
+            key_id is not None
+            and key_id < len(self._values)
+            and self._values[key_id] is not _ABSENT
+        )
+
+    def __getitem__(self, key):
+        key_id = key_ids.get(key)
+        if key_id is not None and key_id < len(self._values):
+            value = self._values[key_id]
+            if value is not _ABSENT:
+                return value
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        key_id = _key_id(key)
+        values = self._values
+        if key_id >= len(values):
+            values.extend([_ABSENT] * (key_id + 1 - len(values)))
+        if values[key_id] is _ABSENT:
+            self.size += 1
+        values[key_id] = value
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self._values[key_ids[key]] = _ABSENT
+        self.size -= 1
+
+    def __iter__(self):
+        for key_id, value in enumerate(self._values):
+            if value is not _ABSENT:
+                yield key_names[key_id]
+
+    def __len__(self):
+        return self.size
 
+    def copy(self):
+        return self.__class__(list(self._values), self.size)
 
-def add(key, value, locale=config.get("locale")):
-    container.setdefault(locale, {})[key] = value
 
+def _new_table():
+    return CompactTable() if config.get("compact_storage") else {}
 
-def has(key, locale=config.get("locale")):
+
+def compact():
+    """Convert the dictionary tables already loaded to ``CompactTable``."""
+    with write_lock:
+        for locale, table in list(container.items()):
+            if isinstance(table, dict):
+                compacted = CompactTable()
+                compacted.update(table)
+                container[locale] = compacted
+
+
+def add(key, value, locale=None):
+    if locale is None:
+        locale = config.get_locale()
+    global generation
+    with write_lock:
+        table = container.get(locale)
+        if table is None:
+            table = container.setdefault(locale, _new_table())
+        table[key] = value
+        generation += 1
+    if missing.data:
+        missing.pop((locale, key))
+
+
+def update(entries, locale=None, removed=()):
+    """Publish a copy of the locale's table with ``entries`` added and the
+    ``removed`` keys dropped, so readers see either version but never a mix.
+    """
+    if locale is None:
+        locale = config.get_locale()
+    global generation
+    with write_lock:
+        table = container.get(locale)
+        table = _new_table() if table is None else table.copy()
+        for key in removed:
+            table.pop(key, None)
+        table.update(entries)
+        container[locale] = table
+        generation += 1
+    if missing.data:
+        for key in entries:
+            missing.pop((locale, key))
+
+
+def has(key, locale=None):
+    if locale is None:
+        locale = config.get_locale()
     return key in container.get(locale, {})
 
 
-def get(key, locale=config.get("locale")):
+def get(key, locale=None):
+    if locale is None:
+        locale = config.get_locale()
     return container[locale][key]
+
+
+def get_fallback_chain(locale):
+    """Return the locales to look a key up in for ``locale``, in order.
+
+    The chain is the locale itself, the locales listed for it in the
+    ``fallback_chains`` setting, then the ``fallback`` setting, which may be
+    a locale or a list of locales.
+    """
+    fallback = config.get("fallback")
+    chains = config.get("fallback_chains")
+    fallbacks = tuple(fallback) if isinstance(fallback, list) else (fallback,)
+    cached = _fallback_chains.get((locale, fallbacks))
+    if cached is not None and cached[0] is chains:
+        return cached[1]
+    chain = []
+    for candidate in (locale,) + tuple(chains.get(locale, ())) + fallbacks:
+        if candidate not in chain:
+            chain.append(candidate)
+    chain = tuple(chain)
+    _fallback_chains[(locale, fallbacks)] = (chains, chain)
+    return chain
+
+
+def mark_missing(key, locale=None):
+    if locale is None:
+        locale = config.get_locale()
+    if config.get("enable_missing_cache"):
+        missing.set((locale, key), True)
+
+
+def is_missing(key, locale=None):
+    if locale is None:
+        locale = config.get_locale()
+    return bool(missing.data) and missing.get((locale, key), False)
+
+
+def clear_missing(locale=None):
+    if locale is None:
+        missing.clear()
+        return
+    for cached_locale, key in list(missing.data):
+        if cached_locale == locale:
+            missing.pop((cached_locale, key))
@@ -1,6 +1,7 @@
 from string import Template
 
-from . import config, resource_loader, translations
+from . import config, plurals, resource_loader, stats, translations
+from .cache import LRUCache
 
 
 class TranslationFormatter(Template):
@@ -8,24 +9,114 @@ class TranslationFormatter(Template):
 
     def __init__(self, template):
         super(TranslationFormatter, self).__init__(template)
+        self.segments, self.has_invalid = self._compile()
+
+    def _compile(self):
+        segments = []
+        literal = []
+        has_invalid = False
+        position = 0
+        for match in self.pattern.finditer(self.template):
+            literal.append(self.template[position : match.start()])
+            position = match.end()
+            name = match.group("named") or match.group("braced")
+            if name is not None:
+                segments.append("".join(literal))
+                segments.append((name, match.group()))
+                literal = []
+            elif match.group("escaped") is not None:
+                literal.append(self.delimiter)
+            else:
+                has_invalid = True
+                literal.append(match.group())
+        literal.append(self.template[position:])
+        segments.append("".join(literal))
+        return tuple(segment for segment in segments if segment), has_invalid
 
     def format(self, **kwargs):
-        if config.get("error_on_missing_placeholder"):
+        strict = config.get("error_on_missing_placeholder")
+        if strict and self.has_invalid:
             return self.substitute(**kwargs)
-        else:
-            return self.safe_substitute(**kwargs)
+        parts = []
+        for segment in self.segments:
+            if segment.__class__ is str:
+                parts.append(segment)
+                continue
+            name, placeholder = segment
+            if name in kwargs:
+                parts.append(str(kwargs[name]))
+            elif strict:
+                raise KeyError(name)
+            else:
+                parts.append(placeholder)
+        return "".join(parts)
+
+
+formatters = LRUCache("formatter_cache_size")
+render_cache = LRUCache("render_cache_size", "render_cache_ttl")
+
+
+def format_translation(translation, **kwargs):
+    if TranslationFormatter.delimiter not in translation:
+        return translation
+    formatter = formatters.get(translation)
+    if formatter is None:
+        formatter = TranslationFormatter(translation)
+        formatters.set(translation, formatter)
+    return formatter.format(**kwargs)
 
 
 def t(key, **kwargs):
-    locale = kwargs.pop("locale", config.get("locale"))
+    locale = kwargs.pop("locale", None) or config.get_locale()
+    if config.get("enable_stats"):
+        return stats.observe(_t, key, locale, kwargs)
+    return _t(key, locale, kwargs)
+
+
+def _t(key, locale, kwargs):
     if translations.has(key, locale):
         return translate(key, locale=locale, **kwargs)
-    else:
-        resource_loader.search_translation(key, locale)
-        if translations.has(key, locale):
-            return translate(key, locale=locale, **kwargs)
-        elif locale != config.get("fallback"):
-            return t(key, locale=config.get("fallback"), **kwargs)
+    resolution = translations.resolutions.get((locale, key))
+    observed = config.get("enable_stats")
+    if resolution is not None and resolution[1] == translations.generation:
+        if observed:
+            stats.count("misses", locale, key)
+            stats.count("fallbacks", locale, key, fallback=resolution[0])
+            stats.count("lookups", resolution[0])
+        return translate(key, locale=resolution[0], **kwargs)
+    previous = None
+    for candidate in translations.get_fallback_chain(locale):
+        if previous is not None and observed:
+            stats.count("fallbacks", previous, key, fallback=candidate)
+            stats.count("lookups", candidate)
+        if _find(key, candidate, observed):
+            if candidate != locale:
+                translations.resolutions[(locale, key)] = (
+                    candidate,
+                    translations.generation,
+                )
+            return translate(key, locale=candidate, **kwargs)
+        if observed:
+            stats.count("misses", candidate, key)
+        previous = candidate
+    return _missing_translation(key, kwargs)
+
+
+def _find(key, locale, observed):
+    if translations.has(key, locale):
+        return True
+    if translations.is_missing(key, locale):
+        return False
+    if observed:
+        stats.count("searches", locale, key)
+    resource_loader.search_translation(key, locale)
+    if translations.has(key, locale):
+        return True
+    translations.mark_missing(key, locale)
+    return False
+
+
+def _missing_translation(key, kwargs):
     if "default" in kwargs:
         return kwargs["default"]
     if config.get("error_on_missing_translation"):
@@ -34,29 +125,197 @@ def t(key, **kwargs):
         return key
 
 
+def t_many(keys, **kwargs):
+    """Translate several keys at once.
+
+    ``keys`` may contain keys or ``(key, kwargs)`` pairs, whose kwargs are
+    merged over the ones given to ``t_many``. The locale and fallback chain
+    are resolved once and missing keys of the same namespace trigger a single
+    search. Returns the translations in the order of ``keys``.
+    """
+    locale = kwargs.pop("locale", None) or config.get_locale()
+    items = [
+        (item, kwargs) if isinstance(item, str) else (item[0], dict(kwargs, **item[1]))
+        for item in keys
+    ]
+    chain = translations.get_fallback_chain(locale)
+    found = _resolve_many([key for key, _ in items], locale)
+    # key -> locale it was found in, when that is a fallback
+    sources = {}
+    for previous, fallback in zip(chain, chain[1:]):
+        if len(found) == len(items):
+            break
+        unresolved = [key for key, _ in items if key not in found]
+        if config.get("enable_stats"):
+            for key in unresolved:
+                stats.count("fallbacks", previous, key, fallback=fallback)
+        resolved = _resolve_many(unresolved, fallback)
+        found.update(resolved)
+        sources.update(dict.fromkeys(resolved, fallback))
+    return [
+        (
+            _render(key, found[key], item_kwargs, sources.get(key, locale))
+            if key in found
+            else _missing_translation(key, item_kwargs)
+        )
+        for key, item_kwargs in items
+    ]
+
+
+def _resolve_many(keys, locale):
+    table = translations.container.get(locale, {})
+    resolved = {}
+    pending = []
+    observed = config.get("enable_stats")
+    for key in keys:
+        if observed:
+            stats.count("lookups", locale)
+        if key in table:
+            resolved[key] = table[key]
+        elif not translations.is_missing(key, locale):
+            pending.append(key)
+        elif observed:
+            stats.count("misses", locale, key)
+    if not pending:
+        return resolved
+    searched = set()
+    for key in pending:
+        group = resource_loader.search_group(key)
+        if group in searched or key in translations.container.get(locale, {}):
+            # an earlier search of this group, or file, loaded the key
+            continue
+        searched.add(group)
+        if observed:
+            stats.count("searches", locale, key)
+        resource_loader.search_translation(key, locale)
+    table = translations.container.get(locale, {})
+    for key in pending:
+        if key in table:
+            resolved[key] = table[key]
+        else:
+            translations.mark_missing(key, locale)
+            if observed:
+                stats.count("misses", locale, key)
+    return resolved
+
+
+class Scope(object):
+    """Translator bound to a namespace and a locale.
+
+    The namespace is loaded when the scope is created and its translations
+    are kept in a table of their own, so ``scope.t("key")`` is a single
+    dictionary lookup. Keys missing from that table go through ``t``.
+    """
+
+    def __init__(self, namespace, locale, table):
+        super(Scope, self).__init__()
+        self.namespace = namespace
+        self.locale = locale
+        self.prefix = namespace + config.get("namespace_delimiter")
+        self.table = table
+
+    def t(self, key, **kwargs):
+        translation = self.table.get(key)
+        if translation is None or "locale" in kwargs:
+            kwargs.setdefault("locale", self.locale)
+            return t(self.prefix + key, **kwargs)
+        if "count" in kwargs:
+            key = self.prefix + key
+        return _render(key, translation, kwargs, self.locale)
+
+
+scopes = {}
+
+
+def _namespace_table(prefix, table):
+    return {
+        key[len(prefix) :]: value
+        for key, value in (table or {}).items()
+        if key.startswith(prefix)
+    }
+
+
+def scope(namespace, locale=None):
+    if locale is None:
+        locale = config.get_locale()
+    table = translations.container.get(locale)
+    cached = scopes.get((namespace, locale))
+    if (
+        cached is not None
+        and cached[0] is table
+        and cached[1] == translations.generation
+    ):
+        return cached[2]
+    prefix = namespace + config.get("namespace_delimiter")
+    namespace_table = _namespace_table(prefix, table)
+    if not namespace_table:
+        resource_loader.search_translation(prefix, locale)
+        table = translations.container.get(locale)
+        namespace_table = _namespace_table(prefix, table)
+    bound = Scope(namespace, locale, namespace_table)
+    scopes[(namespace, locale)] = (table, translations.generation, bound)
+    return bound
+
+
 def translate(key, **kwargs):
-    locale = kwargs.pop("locale", config.get("locale"))
-    translation = translations.get(key, locale=locale)
+    locale = kwargs.pop("locale", None) or config.get_locale()
+    return _render(key, translations.get(key, locale=locale), kwargs, locale)
+
+
+def _render(key, translation, kwargs, locale=None):
+    if config.get("enable_render_cache"):
+        return _cached_render(key, translation, kwargs, locale)
+    return _render_translation(key, translation, kwargs, locale)
+
+
+def _cached_render(key, translation, kwargs, locale):
+    """Render through ``render_cache``, keyed on the key, locale and arguments.
+
+    An entry is only used if it was rendered from the same translation
+    object, so replacing a translation invalidates what was rendered from it.
+    Arguments that cannot be hashed bypass the cache.
+    """
+    try:
+        cache_key = (
+            key,
+            locale,
+            tuple(
+                (name, value.__class__, value) for name, value in sorted(kwargs.items())
+            ),
+        )
+        cached = render_cache.get(cache_key)
+    except TypeError:
+        return _render_translation(key, translation, kwargs, locale)
+    if cached is not None and cached[0] is translation:
+        return cached[1]
+    result = _render_translation(key, translation, kwargs, locale)
+    render_cache.set(cache_key, (translation, result))
+    return result
+
+
+def _render_translation(key, translation, kwargs, locale=None):
     if "count" in kwargs:
-        translation = pluralize(key, translation, kwargs["count"])
-    return TranslationFormatter(translation).format(**kwargs)
+        translation = pluralize(key, translation, kwargs["count"], locale)
+    return format_translation(translation, **kwargs)
+
 
+def pluralize(key, translation, count, locale=None):
+    """Return the form of ``translation`` to use for ``count``.
 
-def pluralize(key, translation, count):
+    The form is chosen by the plural rule of the locale (see
+    ``i18n.plurals``). A ``zero`` form is always used for 0 when present,
+    and ``other``, then ``many``, when the form is missing.
+    """
     return_value = key
     try:
         if not isinstance(translation, dict):
             return_value = translation
             raise KeyError("use of count witouth dict for key {0}".format(key))
-        if count == 0:
-            if "zero" in translation:
-                return translation["zero"]
-        elif count == 1:
-            if "one" in translation:
-                return translation["one"]
-        elif count <= config.get("plural_few"):
-            if "few" in translation:
-                return translation["few"]
+        if count == 0 and "zero" in translation:
+            return translation["zero"]
+        form = plurals.get_rule(locale)(count)
+        if form in translation:
+            return translation[form]
         # TODO: deprecate other
         if "other" in translation:
             return translation["other"]
@@ -15,6 +15,9 @@ setup(
     include_package_data=True,
     zip_safe=True,
     test_suite="i18n.tests",
+    entry_points={
+        "console_scripts": ["i18n = i18n.cli:main"],
+    },
     extras_require={
         "YAML": ["pyyaml>=3.10"],
     },